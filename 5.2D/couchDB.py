@@ -3,6 +3,12 @@ import json  # To parse and handle JSON payloads
 import requests  # For HTTP requests to CouchDB
 from requests.auth import HTTPBasicAuth  # For basic authentication with CouchDB
 import pandas as pd  # For handling and cleaning CSV data
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))  # Shared helpers live in the repo root
+from db_sinks import CouchBulkWriter, couch_session  # Batched _bulk_docs writes on a pooled session
+from db_export import export_couch  # Paged, resumable export from the _changes feed
 
 # MQTT connection details for HiveMQ broker
 mqttBroker = "27298008709441c5b8a12aac22fa02d9.s1.eu.hivemq.cloud"
@@ -17,6 +23,11 @@ db_name = "sensor_data"
 admin_user = "raghavthaman"
 admin_password = "Raghav@3006couchDB"
 
+# One keep-alive session for all CouchDB traffic; incoming samples are queued and
+# written with _bulk_docs (same batch_size/linger knobs as the MongoDB writer)
+session = couch_session(admin_user, admin_password)
+writer = CouchBulkWriter(session, f"{couchDB_url}/{db_name}", batch_size=500, linger=0.5)
+
 # Create CouchDB database if it does not already exist
 def create_db():
     try:
@@ -48,30 +59,24 @@ def on_message(client, userdata, message):
         data = json.loads(payload)  # Parse the JSON payload
         print(f"Received: {data}")
 
-        # Insert data into CouchDB using HTTP POST
-        response = requests.post(f"{couchDB_url}/{db_name}", json=data, auth=HTTPBasicAuth(admin_user, admin_password))
-        if response.status_code == 201:
-            print("Data inserted into CouchDB")
-        else:
-            print(f"Failed to insert data into CouchDB: {response.text}")
+        # Queue data for the CouchDB writer thread
+        writer.put(data)
     except json.JSONDecodeError as e:
         print(f"Error decoding JSON: {e}")
 
 # Save all documents from CouchDB to a CSV file
+# Pages through the _changes feed, keeping only x/y/z/timestamp (no _id/_rev), starting where the last export stopped
 def save_to_csv():
-    response = requests.get(f"{couchDB_url}/{db_name}/_all_docs?include_docs=true", auth=HTTPBasicAuth(admin_user, admin_password))
-    if response.status_code == 200:
-        docs = response.json()['rows']
-        data = [doc['doc'] for doc in docs]  # Extract documents from response
-        df = pd.DataFrame(data)  # Convert to DataFrame
-        df.to_csv("gyroscope_data.csv", index=False)  # Save raw data
+    try:
+        export_couch(session, f"{couchDB_url}/{db_name}", "gyroscope_data.csv", state_file="couch_export_state.json")
         print("Data saved to gyroscope_data.csv")
-    else:
-        print(f"Failed to fetch data from CouchDB: {response.text}")
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to fetch data from CouchDB: {e}")
 
 # Clean the saved CSV by removing non-numeric or empty fields
 def clean_data():
     df = pd.read_csv("gyroscope_data.csv")  # Load raw data from CSV
+    df = df.dropna(axis=1, how='all')  # Drop fields no document has (e.g. timestamp from older sketches)
     df = df.dropna()  # Drop rows with missing values
     df = df.apply(pd.to_numeric, errors='coerce')  # Convert to numeric values
     df.to_csv("cleaned_gyroscope_data.csv", index=False)  # Save cleaned data
@@ -102,6 +107,10 @@ time.sleep(1800)  # Adjust collection time as needed
 client.loop_stop()
 client.disconnect()
 
+# Flush anything still queued before exporting
+writer.close()
+print(f"CouchDB writer stats: {writer.metrics()}")
+
 # Save collected data to CSV and perform cleaning
 save_to_csv()
 clean_data()
\ No newline at end of file
@@ -2,6 +2,12 @@ import paho.mqtt.client as mqtt  # MQTT library for connecting to HiveMQ
 import json  # For parsing JSON data
 from pymongo import MongoClient  # MongoDB client for Python
 import pandas as pd  # For data handling and cleaning
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))  # Shared helpers live in the repo root
+from db_sinks import MongoBatchWriter  # Batched writes from a worker thread
+from db_export import export_mongo  # Streaming, resumable CSV export
 
 # MQTT connection details for HiveMQ broker
 mqttBroker = "27298008709441c5b8a12aac22fa02d9.s1.eu.hivemq.cloud"
@@ -15,6 +21,10 @@ mongoClient = MongoClient("mongodb://localhost:27017/")  # Connect to local Mong
 db = mongoClient["sensor_data"]  # Database name
 collection = db["gyroscope"]  # Collection to store sensor readings
 
+# Writes are queued and sent with insert_many from a worker thread, so a slow
+# MongoDB never holds up the MQTT network loop
+writer = MongoBatchWriter(collection, batch_size=500, linger=0.5)
+
 # Callback when connected to MQTT broker
 def on_connect(client, userdata, flags, rc, properties=None):
     if rc == 0:
@@ -30,17 +40,15 @@ def on_message(client, userdata, message):
         data = json.loads(payload)  # Parse JSON data
         print(f"Received: {data}")
 
-        # Insert the parsed data into MongoDB collection
-        collection.insert_one(data)
-        print("Data inserted into MongoDB")
+        # Queue the parsed data for the MongoDB writer thread
+        writer.put(data)
     except json.JSONDecodeError as e:
         print(f"Error decoding JSON: {e}")
 
 # Function to save collected MongoDB data into a CSV file
+# Only x, y, z and timestamp are fetched, in batches, and only documents newer than the last export
 def save_to_csv():
-    data = list(collection.find())  # Retrieve all documents from the collection
-    df = pd.DataFrame(data)  # Convert to DataFrame
-    df.to_csv("gyroscope_data.csv", index=False)  # Save to CSV file
+    export_mongo(collection, "gyroscope_data.csv", state_file="mongo_export_state.json")
     print("Data saved to gyroscope_data.csv")
 
 # Function to clean the CSV data by removing invalid or missing values
@@ -73,6 +81,10 @@ time.sleep(1800)  # Adjust duration if necessary
 client.loop_stop()
 client.disconnect()
 
+# Flush anything still queued before exporting
+writer.close()
+print(f"MongoDB writer stats: {writer.metrics()}")
+
 # Save the collected data to CSV and clean it
 save_to_csv()
 clean_data()
\ No newline at end of file
@@ -1,18 +1,27 @@
+import os
+import sys
 import threading
 import time
 from arduino_iot_cloud import ArduinoCloudClient
-from smooth_dash_wrapper import create_smooth_dash_app
-from dash import Dash, dcc, html
-from dash.dependencies import Input, Output
-import plotly.graph_objs as go
+from smooth_dash_wrapper import create_smooth_dash_app, create_incremental_dash_app, create_push_dash_app
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))  # Shared helpers live in the repo root
+from ring_buffer import RingBuffer
 
 # --- Arduino IoT Credentials ---
 DEVICE_ID = "5e48c1f8-1778-4e32-8731-5300d17dcbc5"
 SECRET_KEY = "AwZkk2oLmWoWWU@IsgOPburTc"
 
 # --- Data Buffer ---
-buffer = {"x": [], "y": [], "z": [], "timestamp": []}
+# Fixed-size NumPy ring buffer: O(1) appends, safe to read from the Dash thread
 BUFFER_SIZE = 200
+buffer = RingBuffer(BUFFER_SIZE, ["x", "y", "z", "timestamp"])
+
+# --- Dashboard Mode ---
+# "push": new samples are encoded once and streamed to every open browser (best with many viewers)
+# "incremental": each browser polls for the samples it hasn't drawn yet
+# "full": the whole figure is rebuilt and sent every tick
+DASHBOARD_MODE = "push"
 
 # --- Live Vars ---
 x, y, z = 0, 0, 0
@@ -36,47 +45,21 @@ def start_arduino_stream():
         timestamp = time.time()
 
         if x is not None and y is not None and z is not None:
-            buffer['x'].append(x)
-            buffer['y'].append(y)
-            buffer['z'].append(z)
-            buffer['timestamp'].append(timestamp)
-
-            if len(buffer['x']) > BUFFER_SIZE:
-                for k in buffer:
-                    buffer[k] = buffer[k][-BUFFER_SIZE:]
+            buffer.append(x, y, z, timestamp)
 
             x, y, z = None, None, None
 
         time.sleep(0.05)  # ~20 Hz
 
-# --- Dash App Layout & Callbacks ---
-app = Dash(__name__)
-app.layout = html.Div([
-    html.H3("📱 Live Accelerometer Data (Smooth Plot)"),
-    dcc.Graph(id='live-graph', animate=False),
-    dcc.Interval(id='interval', interval=100, n_intervals=0)
-])
-
-@app.callback(
-    Output('live-graph', 'figure'),
-    Input('interval', 'n_intervals')
-)
-def update_graph(n):
-    fig = go.Figure()
-    if len(buffer['x']) < 2:
-        return fig
-
-    fig.add_trace(go.Scatter(y=buffer['x'], name='X', mode='lines', line_shape='spline'))
-    fig.add_trace(go.Scatter(y=buffer['y'], name='Y', mode='lines', line_shape='spline'))
-    fig.add_trace(go.Scatter(y=buffer['z'], name='Z', mode='lines', line_shape='spline'))
-
-    fig.update_layout(
-        title='Accelerometer X/Y/Z',
-        xaxis_title='Sample Index',
-        yaxis_title='Acceleration (g)',
-        uirevision='true'
-    )
-    return fig
+# --- Dash App ---
+if DASHBOARD_MODE == "push":
+    app = create_push_dash_app(lambda seq: buffer.since(seq, ['x', 'y', 'z']), title="📱 Live Accelerometer Data (Smooth Plot)",
+                               max_points=BUFFER_SIZE)
+elif DASHBOARD_MODE == "incremental":
+    app = create_incremental_dash_app(lambda seq: buffer.since(seq, ['x', 'y', 'z']), title="📱 Live Accelerometer Data (Smooth Plot)",
+                                      refresh_interval=100, max_points=BUFFER_SIZE)
+else:
+    app = create_smooth_dash_app(buffer, title="📱 Live Accelerometer Data (Smooth Plot)", refresh_interval=100, animate=False)
 
 # --- Start Everything ---
 if __name__ == '__main__':
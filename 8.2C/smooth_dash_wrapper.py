@@ -1,12 +1,20 @@
-from dash import Dash, dcc, html
-from dash.dependencies import Input, Output
+import base64
+import json
+import os
+import sys
+import numpy as np
+from dash import Dash, dcc, html, no_update
+from dash.dependencies import Input, Output, State
 import plotly.graph_objs as go
 
-def create_smooth_dash_app(buffer, title="Live Sensor Data", refresh_interval=200):
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))  # Shared helpers live in the repo root
+from live_push import PushHub
+
+def create_smooth_dash_app(buffer, title="Live Sensor Data", refresh_interval=200, animate=True):
     app = Dash(__name__)
     app.layout = html.Div([
         html.H3(f" {title}"),
-        dcc.Graph(id='live-graph', animate=True),
+        dcc.Graph(id='live-graph', animate=animate),
         dcc.Interval(id='interval', interval=refresh_interval, n_intervals=0)
     ])
 
@@ -32,3 +40,185 @@ def create_smooth_dash_app(buffer, title="Live Sensor Data", refresh_interval=20
         return fig
 
     return app
+
+# --- Incremental mode ---
+# Each browser keeps the sequence number of the last sample it has drawn. Every tick
+# it sends that number back and the server replies with only the samples after it,
+# packed as base64 float32, and a clientside callback appends them with
+# Plotly.extendTraces. The number is only advanced once the samples are on screen,
+# so a dropped or repeated response is made good by the next tick instead of losing
+# samples. The figure is only built once, so nothing is re-serialized per tick
+# except the new samples.
+
+def encode_samples(data):
+    return base64.b64encode(np.ascontiguousarray(data, dtype=np.float32).tobytes()).decode('ascii')
+
+# Decodes the float32 payload and appends it to the three traces (or replaces them on reset),
+# skipping samples already drawn; returns the new last drawn sample for the next request
+EXTEND_TRACES_JS = """
+function(chunk, maxPoints, drawn) {
+    if (!chunk) { return window.dash_clientside.no_update; }
+    var gd = document.getElementById('live-graph').getElementsByClassName('js-plotly-plot')[0];
+    if (!gd) { return window.dash_clientside.no_update; }
+    if (drawn === null || drawn === undefined) { drawn = -1; }
+    if (!chunk.reset) {
+        if (chunk.seq <= drawn) { return window.dash_clientside.no_update; }  // Late or repeated response
+        if (chunk.start > drawn) { return -1; }  // Samples missing in between: ask for the whole window
+    }
+    var bytes = Uint8Array.from(atob(chunk.data), function(c) { return c.charCodeAt(0); });
+    var values = new Float32Array(bytes.buffer);
+    var n = chunk.n;
+    var skip = chunk.reset ? 0 : drawn - chunk.start;
+    var ys = [0, 1, 2].map(function(i) { return Array.from(values.subarray(i * n + skip, (i + 1) * n)); });
+    if (chunk.reset) {
+        Plotly.restyle(gd, {y: ys}, [0, 1, 2]);
+    } else {
+        Plotly.extendTraces(gd, {y: ys}, [0, 1, 2], maxPoints);
+    }
+    return chunk.seq;
+}
+"""
+
+def create_incremental_dash_app(get_since, title="Live Sensor Data", refresh_interval=200, max_points=200):
+    """Live X/Y/Z plot that only ships newly appended samples to each browser
+
+    get_since(seq) must return (new_seq, (3, n) array, reset), e.g.
+    lambda seq: ring_buffer.since(seq, ['x', 'y', 'z']).
+    """
+    app = Dash(__name__)
+
+    fig = go.Figure()
+    for name in ('X', 'Y', 'Z'):
+        fig.add_trace(go.Scatter(y=[], name=name, mode='lines', line_shape='spline'))
+    fig.update_layout(
+        title='Accelerometer X/Y/Z',
+        xaxis_title='Sample Index',
+        yaxis_title='Acceleration (g)',
+        uirevision='true'
+    )
+
+    app.layout = html.Div([
+        html.H3(f" {title}"),
+        dcc.Graph(id='live-graph', figure=fig),
+        dcc.Interval(id='interval', interval=refresh_interval, n_intervals=0),
+        dcc.Store(id='new-samples'),
+        dcc.Store(id='max-points', data=max_points),
+        dcc.Store(id='drawn-seq', data=-1)  # Last sample on screen (-1 = nothing yet), written by the clientside callback
+    ])
+
+    @app.callback(
+        Output('new-samples', 'data'),
+        Input('interval', 'n_intervals'),
+        State('drawn-seq', 'data')
+    )
+    def send_new_samples(n, drawn):
+        drawn = -1 if drawn is None else drawn
+        new_seq, data, reset = get_since(max(drawn, 0))
+        reset = reset or drawn < 0
+        if data.shape[1] == 0 and not reset:
+            return no_update
+        return {'start': new_seq - int(data.shape[1]), 'seq': new_seq, 'n': int(data.shape[1]),
+                'reset': reset, 'data': encode_samples(data)}
+
+    app.clientside_callback(
+        EXTEND_TRACES_JS,
+        Output('drawn-seq', 'data'),
+        Input('new-samples', 'data'),
+        State('max-points', 'data'),
+        State('drawn-seq', 'data')
+    )
+
+    return app
+
+# --- Push mode ---
+# The server encodes each new chunk of samples once and a live_push.PushHub
+# fans it out to every open browser over Server-Sent Events, so adding viewers
+# doesn't add figure renders or polls. Browsers that fall behind are sent the
+# whole window again instead of their backlog.
+
+def sample_feed(get_since):
+    """(poll, snapshot) functions for a PushHub, encoding samples like the incremental mode"""
+    state = {'seq': 0}
+
+    def payload(new_seq, data, reset):
+        return json.dumps({'start': new_seq - int(data.shape[1]), 'seq': new_seq, 'n': int(data.shape[1]),
+                           'reset': reset, 'data': encode_samples(data)})
+
+    def poll():
+        new_seq, data, reset = get_since(state['seq'])
+        if data.shape[1] == 0 and not reset:
+            return None
+        state['seq'] = new_seq
+        return payload(new_seq, data, reset)
+
+    def snapshot():
+        new_seq, data, _ = get_since(0)
+        return payload(new_seq, data, True)
+
+    return poll, snapshot
+
+# Opens the event stream once and applies each chunk, skipping samples already drawn
+PUSH_CLIENT_JS = """
+function(url, maxPoints) {
+    if (window.liveStream) { return window.dash_clientside.no_update; }
+    var drawn = -1;
+    window.liveStream = new EventSource(url);
+    window.liveStream.onmessage = function(event) {
+        var chunk = JSON.parse(event.data);
+        var gd = document.getElementById('live-graph').getElementsByClassName('js-plotly-plot')[0];
+        if (!gd || (!chunk.reset && chunk.seq <= drawn)) { return; }
+        var bytes = Uint8Array.from(atob(chunk.data), function(c) { return c.charCodeAt(0); });
+        var values = new Float32Array(bytes.buffer);
+        var n = chunk.n;
+        var skip = chunk.reset ? 0 : Math.max(0, drawn - chunk.start);
+        var ys = [0, 1, 2].map(function(i) { return Array.from(values.subarray(i * n + skip, (i + 1) * n)); });
+        if (chunk.reset) {
+            Plotly.restyle(gd, {y: ys}, [0, 1, 2]);
+        } else {
+            Plotly.extendTraces(gd, {y: ys}, [0, 1, 2], maxPoints);
+        }
+        drawn = chunk.seq;
+    };
+    return url;
+}
+"""
+
+def create_push_dash_app(get_since, title="Live Sensor Data", max_points=200, push_interval=0.1):
+    """Live X/Y/Z plot fed by one shared event stream instead of per-browser polling
+
+    get_since has the same contract as for create_incremental_dash_app.
+    The hub is returned as app.push_hub (see its metrics()).
+    """
+    app = Dash(__name__)
+    poll, snapshot = sample_feed(get_since)
+    hub = PushHub(snapshot=snapshot)
+    hub.attach(app.server, '/stream')
+    hub.start_pump(poll, push_interval)
+    app.push_hub = hub
+
+    fig = go.Figure()
+    for name in ('X', 'Y', 'Z'):
+        fig.add_trace(go.Scatter(y=[], name=name, mode='lines', line_shape='spline'))
+    fig.update_layout(
+        title='Accelerometer X/Y/Z',
+        xaxis_title='Sample Index',
+        yaxis_title='Acceleration (g)',
+        uirevision='true'
+    )
+
+    app.layout = html.Div([
+        html.H3(f" {title}"),
+        dcc.Graph(id='live-graph', figure=fig),
+        dcc.Store(id='stream-url', data='/stream'),
+        dcc.Store(id='max-points', data=max_points),
+        dcc.Store(id='stream-opened')
+    ])
+
+    app.clientside_callback(
+        PUSH_CLIENT_JS,
+        Output('stream-opened', 'data'),
+        Input('stream-url', 'data'),
+        State('max-points', 'data')
+    )
+
+    return app
@@ -0,0 +1,390 @@
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Append-only columnar store for sensor logs.
+#
+# A store is a directory holding index.json plus one .npy file per column per chunk:
+#   gyro_store/index.json
+#   gyro_store/chunk_000000.timestamp.npy   int64 epoch nanoseconds
+#   gyro_store/chunk_000000.x.npy           float32
+#   ...
+# index.json lists every chunk with its first/last timestamp, so reading a time
+# range only memory-maps the chunks that overlap it.
+#
+# A chunk is only written once CHUNK_ROWS rows have built up, which can take
+# hours for a slow sensor. A writer given flush_interval also publishes the
+# rows it is still buffering as a "tail" (tail_<ns>.<col>.npy, listed under
+# 'tail' in index.json) at least that often. The tail is rewritten in place,
+# so readers see new rows within seconds without the store filling up with
+# tiny chunks.
+CHUNK_ROWS = 65536
+INDEX_FILE = 'index.json'
+
+
+class ColumnStore:
+    """Writer/reader for a chunked float32 + epoch-ns column store"""
+
+    def __init__(self, path, columns=None, chunk_rows=CHUNK_ROWS, flush_interval=None):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.flush_interval = flush_interval  # Seconds buffered rows may wait before readers can see them
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                self.index = json.load(f)
+            if columns is not None and list(columns) != self.index['columns']:
+                raise ValueError(f"{path} has columns {self.index['columns']}, not {list(columns)}")
+        elif columns is None:
+            raise FileNotFoundError(f"No column store at {path}")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.index = {'columns': list(columns), 'chunks': [], 'created': time.time_ns()}  # 'created' tells runs apart
+            self._save_index()
+
+        self.columns = self.index['columns']
+        self._timestamps = []
+        self._values = []
+        self._pending = 0
+        self._writing = False
+        self._last_publish = time.time()
+
+    def __len__(self):
+        # A writer's tail is a copy of rows it is still buffering, so only count it for readers
+        tail = self.index.get('tail')
+        return sum(c['rows'] for c in self.index['chunks']) + max(self._pending, tail['rows'] if tail else 0)
+
+    def segments(self):
+        """Chunks readers can see, in time order, including the tail of a store still being written"""
+        tail = self.index.get('tail')
+        return self.index['chunks'] + ([tail] if tail else [])
+
+    # ---- Writing ----
+
+    def append(self, timestamps, values):
+        """Buffer rows; timestamps are epoch ns and must not go backwards"""
+        if not self._writing:
+            self._writing = True
+            self._adopt_tail()
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float32).reshape(len(timestamps), len(self.columns))
+        self._timestamps.append(timestamps)
+        self._values.append(values)
+        self._pending += len(timestamps)
+        while self._pending >= self.chunk_rows:
+            self._write_chunk(self.chunk_rows)
+        self.tick()
+
+    def write(self, batch):
+        # Lets the store be used directly as a serial_ingest.SerialIngest sink
+        self.append(batch.timestamps, batch.values)
+
+    def tick(self):
+        """Publish buffered rows as the tail if they have waited flush_interval (SerialIngest calls this)"""
+        if self.flush_interval is not None and self._pending and time.time() - self._last_publish >= self.flush_interval:
+            self._write_tail()
+
+    def flush(self):
+        """Write buffered rows out as a (possibly short) chunk"""
+        if self._pending:
+            self._write_chunk(self._pending)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_chunk(self, rows):
+        timestamps = np.concatenate(self._timestamps)
+        values = np.concatenate(self._values)
+        self._timestamps = [timestamps[rows:]]
+        self._values = [values[rows:]]
+        self._pending -= rows
+        timestamps, values = timestamps[:rows], values[:rows]
+
+        name = f"chunk_{len(self.index['chunks']):06d}"
+        np.save(os.path.join(self.path, f"{name}.timestamp.npy"), timestamps)
+        for i, col in enumerate(self.columns):
+            np.save(os.path.join(self.path, f"{name}.{col}.npy"), np.ascontiguousarray(values[:, i]))
+
+        self.index['chunks'].append({
+            'name': name,
+            'rows': int(rows),
+            'start': int(timestamps[0]),
+            'end': int(timestamps[-1]),
+        })
+        # The tail's rows are now (at least partly) in the chunk; what is left is published on the next tick
+        old_tail = self.index.pop('tail', None)
+        self._save_index()
+        self._remove(old_tail)
+        self._last_publish = time.time()
+
+    def _write_tail(self):
+        timestamps = np.concatenate(self._timestamps)
+        values = np.concatenate(self._values)
+        self._timestamps, self._values = [timestamps], [values]
+
+        name = f"tail_{time.time_ns()}"
+        np.save(os.path.join(self.path, f"{name}.timestamp.npy"), timestamps)
+        for i, col in enumerate(self.columns):
+            np.save(os.path.join(self.path, f"{name}.{col}.npy"), np.ascontiguousarray(values[:, i]))
+        old_tail = self.index.get('tail')
+        self.index['tail'] = {'name': name, 'rows': int(len(timestamps)),
+                              'start': int(timestamps[0]), 'end': int(timestamps[-1])}
+        self._save_index()
+        self._remove(old_tail)
+        self._last_publish = time.time()
+
+    def _adopt_tail(self):
+        # A writer that stopped without close() left its buffered rows as a tail; they go into the next chunk
+        tail = self.index.get('tail')
+        if tail:
+            self._timestamps.append(np.load(os.path.join(self.path, f"{tail['name']}.timestamp.npy")))
+            self._values.append(np.column_stack([np.load(os.path.join(self.path, f"{tail['name']}.{col}.npy"))
+                                                 for col in self.columns]))
+            self._pending += tail['rows']
+
+    def _remove(self, segment):
+        if segment:
+            for col in ['timestamp'] + self.columns:
+                try:
+                    os.remove(os.path.join(self.path, f"{segment['name']}.{col}.npy"))
+                except OSError:
+                    pass  # Already gone, or (on Windows) still mapped by a reader; it is no longer in the index either way
+
+    def _save_index(self):
+        # Write to a temp file and rename so readers never see a half-written index
+        tmp = os.path.join(self.path, INDEX_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, os.path.join(self.path, INDEX_FILE))
+
+    # ---- Reading ----
+
+    def reload(self):
+        """Pick up chunks written by another process"""
+        with open(os.path.join(self.path, INDEX_FILE)) as f:
+            self.index = json.load(f)
+
+    def time_range(self):
+        chunks = self.segments()
+        if not chunks:
+            return None, None
+        return chunks[0]['start'], chunks[-1]['end']
+
+    def read(self, start=None, end=None, columns=None):
+        """Return {'timestamp': int64 array, col: float32 array, ...} for start <= t <= end (epoch ns)"""
+        columns = self.columns if columns is None else list(columns)
+        chunks = self.segments()
+
+        # Chunks are in time order, so binary search for the first one that can overlap
+        first = 0 if start is None else bisect.bisect_left([c['end'] for c in chunks], start)
+        parts = {'timestamp': []}
+        parts.update({col: [] for col in columns})
+        for chunk in chunks[first:]:
+            if end is not None and chunk['start'] > end:
+                break
+            try:
+                ts = np.load(os.path.join(self.path, f"{chunk['name']}.timestamp.npy"), mmap_mode='r')
+                lo = 0 if start is None else np.searchsorted(ts, start, side='left')
+                hi = len(ts) if end is None else np.searchsorted(ts, end, side='right')
+                if lo >= hi:
+                    continue
+                block = {'timestamp': np.array(ts[lo:hi])}
+                for col in columns:
+                    data = np.load(os.path.join(self.path, f"{chunk['name']}.{col}.npy"), mmap_mode='r')
+                    block[col] = np.array(data[lo:hi])
+            except FileNotFoundError:
+                continue  # A tail the writer replaced after we read the index; its rows show up on the next read
+            for key, array in block.items():
+                parts[key].append(array)
+
+        result = {}
+        for key, arrays in parts.items():
+            dtype = np.int64 if key == 'timestamp' else np.float32
+            result[key] = np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+        return result
+
+    def iter_frames(self, columns=None):
+        """One DataFrame per chunk (then the tail), for passes over a store too big to load at once"""
+        import pandas as pd
+        columns = self.columns if columns is None else list(columns)
+        for chunk in self.segments():
+            try:
+                frame = pd.DataFrame({col: np.load(os.path.join(self.path, f"{chunk['name']}.{col}.npy"))
+                                      for col in ['timestamp'] + columns})
+            except FileNotFoundError:
+                continue  # A tail the writer has replaced since the index was read
+            frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='ns')
+            yield frame
+
+    def read_frame(self, start=None, end=None, columns=None):
+        """Same as read() but as a pandas DataFrame with a datetime 'timestamp' column"""
+        import pandas as pd
+        data = self.read(start, end, columns)
+        df = pd.DataFrame(data)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ns')
+        return df
+
+    def read_recent_frame(self, seconds=None, columns=None):
+        """DataFrame of the last `seconds` of data (everything if None)"""
+        first, last = self.time_range()
+        start = None if seconds is None or last is None else last - int(seconds * 1e9)
+        return self.read_frame(start, None, columns)
+
+
+class StoreTailer:
+    """Follows a store another process is writing and returns only the rows added since the last read
+
+    The store counterpart of csv_tail.CSVTailer: update() returns (frame,
+    chunk, reset). Each update reloads the index and reads from the newest
+    timestamp already returned, skipping the rows with that timestamp it
+    has already seen, so rows sharing a timestamp are neither lost nor
+    repeated. When the store is replaced by a new recording (archive_store)
+    or shrinks, it starts again from the top and reports a reset.
+
+    Rows are kept in a csv_tail.FrameBuffer, so an update costs about as
+    much as the new rows. With seconds set, only that much history behind
+    the newest row is kept. version() is cheap and changes whenever the
+    writer publishes rows, so callers can use it to decide when to update.
+    """
+
+    def __init__(self, path, seconds=None, columns=None):
+        from csv_tail import FrameBuffer
+        self.path = path
+        self.seconds = seconds
+        self.columns = columns
+        self.rows = 0  # Rows read since the last reset
+        self._store = None
+        self._version = None
+        self._store_rows = 0
+        self._last = None  # Newest timestamp read, and how many of the rows read have it
+        self._at_last = 0
+        self._buffer = FrameBuffer()
+        self._lock = threading.Lock()  # A tailer may be shared by several sessions (Streamlit)
+
+    def version(self):
+        try:
+            return os.stat(os.path.join(self.path, INDEX_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @property
+    def frame(self):
+        return self._buffer.frame if len(self._buffer) else self._to_frame(None)
+
+    def _to_frame(self, data):
+        import pandas as pd
+        if data is None:
+            columns = self.columns or (self._store.columns if self._store else [])
+            data = {'timestamp': np.empty(0, dtype=np.int64)}
+            data.update({col: np.empty(0, dtype=np.float32) for col in columns})
+        frame = pd.DataFrame(data, index=pd.RangeIndex(self.rows, self.rows + len(data['timestamp'])))
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='ns')
+        return frame
+
+    def _reset(self):
+        from csv_tail import FrameBuffer
+        self.rows = 0
+        self._last = None
+        self._at_last = 0
+        self._buffer = FrameBuffer()
+
+    def update(self):
+        """Read new rows and add them to self.frame; returns (frame, chunk, reset)"""
+        with self._lock:
+            version = self.version()
+            if version is None or version == self._version:
+                return self.frame, self._to_frame(None), False
+            self._version = version
+
+            reset = False
+            if self._store is None:
+                self._store = ColumnStore(self.path)
+            else:
+                created = self._store.index.get('created')
+                self._store.reload()
+                if self._store.index.get('created') != created or len(self._store) < self._store_rows:
+                    self._reset()
+                    reset = True
+            self._store_rows = len(self._store)
+
+            if self._last is None:
+                _, newest = self._store.time_range()
+                start = None if self.seconds is None or newest is None else newest - int(self.seconds * 1e9)
+                data = self._store.read(start, None, self.columns)
+            else:
+                data = self._store.read(self._last, None, self.columns)
+                data = {key: array[self._at_last:] for key, array in data.items()}
+
+            n = len(data['timestamp'])
+            chunk = self._to_frame(data)
+            if n:
+                newest = int(data['timestamp'][-1])
+                at_newest = n - int(np.searchsorted(data['timestamp'], newest, side='left'))
+                self._at_last = at_newest + (self._at_last if newest == self._last else 0)
+                self._last = newest
+                self.rows += n
+                self._buffer.append(chunk)
+                if self.seconds is not None:
+                    oldest = np.datetime64(newest - int(self.seconds * 1e9), 'ns')
+                    self._buffer.drop(int(np.searchsorted(self._buffer.column('timestamp'), oldest)))
+            return self.frame, chunk, reset
+
+
+def has_store(path):
+    return os.path.exists(os.path.join(path, INDEX_FILE))
+
+
+def archive_store(path):
+    """Move an existing store aside (to path_YYYYmmddTHHMMSS) so a new recording starts empty
+
+    Returns the new name, or None if there was no store.
+    """
+    if not os.path.exists(path):
+        return None
+    archived = f"{path}_{datetime.now().strftime('%Y%m%dT%H%M%S')}"
+    n = 1
+    while os.path.exists(archived):
+        archived = f"{path}_{datetime.now().strftime('%Y%m%dT%H%M%S')}_{n}"
+        n += 1
+    os.replace(path, archived)
+    return archived
+
+
+def import_csv(csv_path, store_path, timestamp_column=None, chunk_rows=CHUNK_ROWS):
+    """Convert an existing sensor CSV into a column store, keeping only its numeric columns"""
+    import pandas as pd
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.replace(r' \(.*\)', '', regex=True).str.strip()
+    if timestamp_column and timestamp_column in df.columns:
+        parsed = pd.to_datetime(df.pop(timestamp_column).astype(str), format='mixed')
+        timestamps = parsed.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    else:
+        # No usable timestamp: space the rows one second apart
+        timestamps = np.arange(len(df), dtype=np.int64) * 1_000_000_000
+    df = df.apply(pd.to_numeric, errors='coerce').dropna(axis=1, how='all')
+    df = df.drop(columns=[c for c in df.columns if c.startswith('_')])  # _id/_rev from CouchDB dumps
+    order = np.argsort(timestamps, kind='stable')
+
+    with ColumnStore(store_path, list(df.columns), chunk_rows) as store:
+        store.append(timestamps[order], df.to_numpy(dtype=np.float32)[order])
+    print(f"Imported {len(df)} rows of {list(df.columns)} from {csv_path} into {store_path}")
+
+
+if __name__ == '__main__':
+    # Usage: python column_store.py data.csv store_dir [timestamp_column]
+    if len(sys.argv) < 3:
+        print("Usage: python column_store.py <csv file> <store dir> [timestamp column]")
+        sys.exit(1)
+    import_csv(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
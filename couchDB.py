@@ -3,6 +3,8 @@ import json
 import requests
 from requests.auth import HTTPBasicAuth
 import pandas as pd
+from db_sinks import CouchBulkWriter, couch_session
+from db_export import export_couch
 
 # MQTT connection details
 mqttBroker = "27298008709441c5b8a12aac22fa02d9.s1.eu.hivemq.cloud"
@@ -17,6 +19,11 @@ db_name = "sensor_data"
 admin_user = "raghavthaman"  # Your admin username
 admin_password = "Raghav@3006couchDB"  # Your admin password
 
+# One keep-alive session for all CouchDB traffic; incoming samples are queued and
+# written with _bulk_docs (same batch_size/linger knobs as the MongoDB writer)
+session = couch_session(admin_user, admin_password)
+writer = CouchBulkWriter(session, f"{couchDB_url}/{db_name}", batch_size=500, linger=0.5)
+
 # Create CouchDB database if not exists
 def create_db():
     try:
@@ -48,30 +55,24 @@ def on_message(client, userdata, message):
         data = json.loads(payload)
         print(f"Received: {data}")
 
-        # Insert data into CouchDB
-        response = requests.post(f"{couchDB_url}/{db_name}", json=data, auth=HTTPBasicAuth(admin_user, admin_password))
-        if response.status_code == 201:
-            print("Data inserted into CouchDB")
-        else:
-            print(f"Failed to insert data into CouchDB: {response.text}")
+        # Queue data for the CouchDB writer thread
+        writer.put(data)
     except json.JSONDecodeError as e:
         print(f"Error decoding JSON: {e}")
 
 # Function to query CouchDB and save data to CSV
+# Pages through the _changes feed, keeping only x/y/z/timestamp, and only reads changes since the last export
 def save_to_csv():
-    response = requests.get(f"{couchDB_url}/{db_name}/_all_docs?include_docs=true", auth=HTTPBasicAuth(admin_user, admin_password))
-    if response.status_code == 200:
-        docs = response.json()['rows']
-        data = [doc['doc'] for doc in docs]
-        df = pd.DataFrame(data)
-        df.to_csv("gyroscope_data.csv", index=False)
+    try:
+        export_couch(session, f"{couchDB_url}/{db_name}", "gyroscope_data.csv", state_file="couch_export_state.json")
         print("Data saved to gyroscope_data.csv")
-    else:
-        print(f"Failed to fetch data from CouchDB: {response.text}")
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to fetch data from CouchDB: {e}")
 
 # Function to clean data and remove non-numeric or empty fields
 def clean_data():
     df = pd.read_csv("gyroscope_data.csv")
+    df = df.dropna(axis=1, how='all')  # Drop fields no document has (e.g. timestamp from older sketches)
     df = df.dropna()  # Remove rows with missing values
     df = df.apply(pd.to_numeric, errors='coerce')  # Convert to numeric
     df.to_csv("cleaned_gyroscope_data.csv", index=False)
@@ -102,6 +103,10 @@ time.sleep(1800)  # Adjust time as needed
 client.loop_stop()
 client.disconnect()
 
+# Flush anything still queued before exporting
+writer.close()
+print(f"CouchDB writer stats: {writer.metrics()}")
+
 # Save data to CSV and clean it
 save_to_csv()
 clean_data()
@@ -0,0 +1,110 @@
+import csv
+import os
+import threading
+import time
+from datetime import datetime
+
+
+class BufferedCSVSink:
+    """Keeps a CSV file open, buffers rows in memory and writes them out in blocks
+
+    Rows are flushed when a new one arrives after flush_interval, or by tick().
+    Call tick() regularly from the loop that owns the sink (SerialIngest does)
+    so flush_interval also bounds how long rows wait when the sensor goes quiet.
+    """
+
+    def __init__(self, path, header, flush_rows=500, flush_interval=1.0,
+                 rotate_bytes=None, rotate_hourly=False, timestamp_format='%Y-%m-%d %H:%M:%S.%f'):
+        self.path = path
+        self.header = list(header)
+        self.flush_rows = flush_rows  # Flush once this many rows are buffered...
+        self.flush_interval = flush_interval  # ...or once this many seconds have passed since the last flush
+        self.rotate_bytes = rotate_bytes  # Start a new file once the current one reaches this size
+        self.rotate_hourly = rotate_hourly  # Start a new file at the top of every hour
+        self.timestamp_format = timestamp_format  # Used for SerialIngest batches
+
+        self._rows = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._writer = None
+        self._last_flush = time.time()
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, mode='a', newline='')
+        self._writer = csv.writer(self._file)
+        self._hour = datetime.now().strftime('%Y%m%d%H')
+        if self._file.tell() == 0:  # New or empty file, so add the column names
+            self._writer.writerow(self.header)
+
+    def write_row(self, row):
+        with self._lock:
+            if self._file is None:  # Already closed, e.g. a late sample after shutdown
+                return
+            self._rows.append(row)
+            if len(self._rows) >= self.flush_rows or time.time() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def write(self, batch):
+        # Lets the sink be used directly with serial_ingest.SerialIngest
+        with self._lock:
+            if self._file is None:
+                return
+            self._rows.extend(batch.rows(self.timestamp_format))
+            if len(self._rows) >= self.flush_rows or time.time() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def tick(self):
+        # Flush rows that have waited flush_interval, even if no new row has come in since
+        with self._lock:
+            if self._file is not None and self._rows and time.time() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+
+    def close(self):
+        # Write out anything still buffered and make sure it reaches the disk
+        with self._lock:
+            if self._file is None:
+                return
+            self._flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.writerows(self._rows)
+            self._rows = []
+            self._file.flush()  # Hand the block to the OS; fsync only happens on rotation and close
+        self._last_flush = time.time()
+        if self._should_rotate():
+            self._rotate()
+
+    def _should_rotate(self):
+        if self.rotate_bytes and self._file.tell() >= self.rotate_bytes:
+            return True
+        return self.rotate_hourly and datetime.now().strftime('%Y%m%d%H') != self._hour
+
+    def _rotate(self):
+        # Move the full file aside with a timestamped name and carry on in a fresh one
+        os.fsync(self._file.fileno())
+        self._file.close()
+        stem, ext = os.path.splitext(self.path)
+        rotated = f"{stem}_{datetime.now().strftime('%Y%m%dT%H%M%S')}{ext}"
+        n = 1
+        while os.path.exists(rotated):
+            rotated = f"{stem}_{datetime.now().strftime('%Y%m%dT%H%M%S')}_{n}{ext}"
+            n += 1
+        os.replace(self.path, rotated)
+        print(f"Rotated {self.path} to {rotated}")
+        self._open()
@@ -0,0 +1,177 @@
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Incremental reader for CSV files that are being appended to (e.g. by data.py),
+# so a dashboard refresh only parses the bytes written since the last one.
+MIN_CAPACITY = 1024  # Rows a FrameBuffer makes room for at first
+
+
+class FrameBuffer:
+    """A DataFrame that grows at the end for a cost proportional to the new rows only
+
+    Every column lives in a NumPy array with spare room at the end (doubled
+    when it runs out), and frame is a DataFrame over the filled part, so
+    appending a chunk copies the chunk instead of everything kept so far.
+    Rows can be dropped from the front (max_rows keeps at most that many).
+    Row labels carry on across appends. Chunks must all have the same
+    columns; a column's dtype is widened if a later chunk needs it.
+    """
+
+    def __init__(self, max_rows=None):
+        self.max_rows = max_rows
+        self.rows = 0  # Rows ever appended; the newest has label rows - 1
+        self.frame = pd.DataFrame()
+        self._arrays = {}
+        self._start = 0  # The kept rows are [_start, _end) of every array
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def append(self, chunk):
+        if self.max_rows and len(chunk) > self.max_rows:
+            self.rows += len(chunk) - self.max_rows
+            chunk = chunk.iloc[-self.max_rows:]
+        n = len(chunk)
+        if not n:
+            return
+        if self.max_rows:
+            self.drop(len(self) + n - self.max_rows)
+
+        capacity = len(next(iter(self._arrays.values()))) if self._arrays else 0
+        if self._end + n > capacity:
+            # Move the kept rows into arrays twice their new size, so this happens O(log n) times
+            capacity = max(2 * (len(self) + n), MIN_CAPACITY)
+            for col, array in self._arrays.items():
+                grown = np.empty(capacity, dtype=array.dtype)
+                grown[:len(self)] = array[self._start:self._end]
+                self._arrays[col] = grown
+            self._start, self._end = 0, len(self)
+
+        for col in chunk.columns:
+            values = chunk[col].to_numpy()
+            array = self._arrays.get(col)
+            if array is None:
+                array = self._arrays[col] = np.empty(capacity, dtype=values.dtype)
+            else:
+                try:
+                    dtype = np.result_type(array.dtype, values.dtype)
+                except TypeError:
+                    dtype = np.dtype(object)
+                if dtype != array.dtype:
+                    array = self._arrays[col] = array.astype(dtype)
+            array[self._end:self._end + n] = values
+        self._end += n
+        self.rows += n
+        self._publish()
+
+    def drop(self, count):
+        """Forget the oldest count rows"""
+        if count > 0:
+            self._start += min(count, len(self))
+            self._publish()
+
+    def column(self, name):
+        """The kept values of one column, as a view (don't modify it)"""
+        return self._arrays[name][self._start:self._end]
+
+    def _publish(self):
+        # A new DataFrame over views of the arrays; frames handed out earlier never see later writes,
+        # which only go past their end or into new arrays
+        self.frame = pd.DataFrame({col: array[self._start:self._end] for col, array in self._arrays.items()},
+                                  index=pd.RangeIndex(self.rows - len(self), self.rows), copy=False)
+
+
+class CSVTailer:
+    """Follows a growing CSV file and returns only the rows appended since the last read
+
+    The byte offset of the last complete line is remembered; a partially
+    written last line is left in the file and picked up on the next read.
+    If the file shrinks or is replaced (truncated, rotated, rewritten), the
+    tailer starts again from the top and reports a reset. A file reopened
+    with 'w' that has already grown past the old offset is caught by
+    comparing its first bytes (header and first row) with what was read.
+
+    Row numbers carry on between chunks (the index continues from the
+    previous chunk), and self.frame holds every row read (at most max_rows)
+    in a FrameBuffer. `prepare`, if given, is applied to every chunk, e.g.
+    to convert the timestamp column.
+    """
+
+    def __init__(self, path, prepare=None, max_rows=None):
+        self.path = path
+        self.prepare = prepare
+        self.max_rows = max_rows  # Keep at most this many rows in self.frame
+        self._buffer = FrameBuffer(max_rows)
+        self.rows = 0  # Rows read since the last reset
+        self._offset = 0
+        self._header = None
+        self._signature = None  # Header plus first row, to recognise the same file
+        self._file_id = None
+        self._lock = threading.Lock()  # A tailer may be shared by several sessions (Streamlit)
+
+    @property
+    def frame(self):
+        return self._buffer.frame
+
+    def _reset(self):
+        self._buffer = FrameBuffer(self.max_rows)
+        self.rows = 0
+        self._offset = 0
+        self._header = None
+        self._signature = None
+
+    def read_new(self):
+        """Parse the newly appended rows; returns (chunk, reset)"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return pd.DataFrame(), False
+
+        reset = False
+        file_id = (st.st_dev, st.st_ino)
+        if self._file_id is not None and (file_id != self._file_id or st.st_size < self._offset):
+            self._reset()
+            reset = True
+        self._file_id = file_id
+
+        with open(self.path, 'rb') as f:
+            if self._signature is not None and f.read(len(self._signature)) != self._signature:
+                # Rewritten in place (e.g. data.py reopening it with 'w') and already longer than our offset
+                self._reset()
+                reset = True
+            if st.st_size == self._offset:
+                return pd.DataFrame(), reset
+            f.seek(self._offset)
+            new = f.read(st.st_size - self._offset)
+
+        # Only complete lines are consumed; the rest is read again next time
+        end = new.rfind(b'\n') + 1
+        if end == 0:
+            return pd.DataFrame(), reset
+        self._offset += end
+        lines = new[:end]
+
+        if self._header is None:
+            header_end = lines.find(b'\n') + 1
+            self._header, lines = lines[:header_end], lines[header_end:]
+        if self._signature is None and self.rows == 0 and lines:
+            self._signature = self._header + lines[:lines.find(b'\n') + 1]
+
+        chunk = pd.read_csv(io.BytesIO(self._header + lines))
+        chunk.index = pd.RangeIndex(self.rows, self.rows + len(chunk))
+        self.rows += len(chunk)
+        if self.prepare is not None and len(chunk):
+            chunk = self.prepare(chunk)
+        return chunk, reset
+
+    def update(self):
+        """Read new rows and append them to self.frame; returns (frame, chunk, reset)"""
+        with self._lock:
+            chunk, reset = self.read_new()
+            self._buffer.append(chunk)
+            return self.frame, chunk, reset
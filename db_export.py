@@ -0,0 +1,166 @@
+import csv
+import json
+import os
+
+import numpy as np
+
+from column_store import ColumnStore
+
+# Streaming exports from the sensor databases.
+# Documents are read in pages and written out as they arrive, so memory use
+# doesn't grow with the size of the database. A small JSON state file records
+# how far the last export got, so the next run only reads newer documents.
+FIELDS = ['x', 'y', 'z', 'timestamp']
+BATCH_SIZE = 5000
+
+
+def load_state(state_file):
+    if state_file and os.path.exists(state_file):
+        with open(state_file) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state_file, state):
+    if not state_file:
+        return
+    tmp = state_file + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, state_file)
+
+
+class ExportWriter:
+    """Writes exported rows to a CSV file and/or a column store"""
+
+    def __init__(self, fields, csv_path=None, store_path=None, append=False):
+        self.fields = fields
+        self.rows = 0
+        self.untimed = 0  # Rows left out of the store for having no timestamp
+        self.file = None
+        self.store = None
+        if csv_path:
+            new_file = not append or not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+            self.file = open(csv_path, 'w' if not append else 'a', newline='')
+            self.writer = csv.writer(self.file)
+            if new_file:
+                self.writer.writerow(fields)
+        if store_path:
+            self.store = ColumnStore(store_path, [f for f in fields if f != 'timestamp'])
+
+    def write(self, rows):
+        # rows is a list of lists in self.fields order
+        if not rows:
+            return
+        if self.file:
+            self.writer.writerows(rows)
+        if self.store is not None:
+            # The store is indexed by time, so documents without a timestamp (e.g. older couchDB.py rows) stay CSV-only
+            ts_index = self.fields.index('timestamp')
+            value_index = [i for i, f in enumerate(self.fields) if f != 'timestamp']
+            timed = [r for r in rows if r[ts_index] is not None]
+            self.untimed += len(rows) - len(timed)
+            if timed:
+                timestamps = np.array([float(r[ts_index]) for r in timed]) * 1e9
+                values = np.array([[r[i] for i in value_index] for r in timed], dtype=np.float32)
+                self.store.append(timestamps.astype(np.int64), values)
+        self.rows += len(rows)
+
+    def flush(self):
+        # Called before the state file moves forward, so a crash can't skip rows
+        if self.file:
+            self.file.flush()
+        if self.store is not None:
+            self.store.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+        if self.store is not None:
+            self.store.close()
+
+
+def export_mongo(collection, csv_path=None, store_path=None, fields=FIELDS,
+                 batch_size=BATCH_SIZE, state_file=None):
+    """Export new documents from a MongoDB collection, batch by batch
+
+    Only `fields` are fetched (via a projection). Documents without a
+    timestamp get the creation time stored in their ObjectId. With a
+    state_file, the last exported _id is remembered and the next export
+    continues from there, appending to the same CSV.
+    """
+    from bson import ObjectId
+
+    state = load_state(state_file)
+    query = {}
+    if state.get('last_id'):
+        query['_id'] = {'$gt': ObjectId(state['last_id'])}
+
+    projection = {f: 1 for f in fields}  # _id comes back too; we need it for the high-water mark
+    cursor = collection.find(query, projection).sort('_id', 1).batch_size(batch_size)
+
+    out = ExportWriter(fields, csv_path, store_path, append=bool(state.get('last_id')))
+    rows = []
+    last_id = None
+    try:
+        for doc in cursor:
+            if 'timestamp' in fields and doc.get('timestamp') is None:
+                doc['timestamp'] = doc['_id'].generation_time.timestamp()
+            rows.append([doc.get(f) for f in fields])
+            last_id = doc['_id']
+            if len(rows) >= batch_size:
+                out.write(rows)
+                out.flush()
+                rows = []
+                save_state(state_file, {'last_id': str(last_id)})
+        out.write(rows)
+        out.flush()
+        if last_id is not None:
+            save_state(state_file, {'last_id': str(last_id)})
+    finally:
+        out.close()
+
+    print(f"Exported {out.rows} documents from MongoDB")
+    return out.rows
+
+
+def export_couch(session, db_url, csv_path=None, store_path=None, fields=FIELDS,
+                 batch_size=BATCH_SIZE, state_file=None):
+    """Export new documents from a CouchDB database by paging through its _changes feed
+
+    Each page holds at most batch_size changes and is written out before the
+    next is fetched. Only `fields` are kept, so _id/_rev never reach the CSV.
+    With a state_file, the feed's last_seq is remembered and the next export
+    starts from there.
+    """
+    state = load_state(state_file)
+    since = state.get('since', 0)
+    url = f"{db_url.rstrip('/')}/_changes"
+
+    out = ExportWriter(fields, csv_path, store_path, append=bool(state.get('since')))
+    try:
+        while True:
+            response = session.get(url, params={'since': since, 'limit': batch_size, 'include_docs': 'true'})
+            response.raise_for_status()
+            page = response.json()
+
+            rows = []
+            for change in page['results']:
+                if change.get('deleted') or change['id'].startswith('_design/'):
+                    continue
+                doc = change.get('doc') or {}
+                rows.append([doc.get(f) for f in fields])
+            out.write(rows)
+            out.flush()
+
+            since = page['last_seq']
+            save_state(state_file, {'since': since})
+            if len(page['results']) < batch_size:
+                break
+    finally:
+        out.close()
+
+    print(f"Exported {out.rows} documents from CouchDB")
+    if out.untimed:
+        print(f"{out.untimed} of them had no timestamp and were left out of {store_path}")
+    return out.rows
@@ -0,0 +1,217 @@
+import queue
+import random
+import threading
+import time
+
+
+class BatchWriter:
+    """Queues documents and writes them in batches from a worker thread
+
+    A batch is flushed once it holds batch_size documents or the oldest
+    document has waited linger seconds, whichever comes first. Subclasses
+    implement _write(docs) and return how many documents were stored.
+    """
+
+    def __init__(self, batch_size=500, linger=0.5, queue_size=100000):
+        self.batch_size = batch_size
+        self.linger = linger
+        self.queue = queue.Queue(maxsize=queue_size)  # Bounded so a dead database can't eat all our memory
+
+        # Metrics
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, doc):
+        # Never blocks the caller (e.g. paho's network thread); drops and counts if the queue is full
+        try:
+            self.queue.put_nowait(doc)
+        except queue.Full:
+            self.dropped += 1
+
+    def write(self, batch):
+        # Lets the writer be used as a serial_ingest.SerialIngest sink
+        for ts, values in zip(batch.timestamps.tolist(), batch.values.tolist()):
+            doc = dict(zip(batch.columns, values))
+            doc['timestamp'] = ts / 1e9
+            self.put(doc)
+
+    def close(self):
+        # Stop the worker after it has flushed everything already queued
+        self._stop.set()
+        self._thread.join()
+
+    def metrics(self):
+        return {
+            'queue_depth': self.queue.qsize(),
+            'written': self.written,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'flushes': self.flushes,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+            'avg_flush_ms': round(self._total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            'max_flush_ms': round(self.max_flush_ms, 2),
+        }
+
+    def _run(self):
+        while not (self._stop.is_set() and self.queue.empty()):
+            try:
+                docs = [self.queue.get(timeout=0.2)]
+            except queue.Empty:
+                continue
+
+            # Keep filling the batch until it's full or the first document has waited long enough
+            deadline = time.monotonic() + self.linger
+            while len(docs) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    docs.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(docs)
+
+    def _flush(self, docs):
+        start = time.perf_counter()
+        try:
+            stored = self._write(docs)
+        except Exception as e:
+            print(f"{type(self).__name__}: batch of {len(docs)} failed: {e}")
+            stored = 0
+        elapsed = (time.perf_counter() - start) * 1000
+
+        self.written += stored
+        self.failed += len(docs) - stored
+        self.flushes += 1
+        self.last_flush_ms = elapsed
+        self.max_flush_ms = max(self.max_flush_ms, elapsed)
+        self._total_flush_ms += elapsed
+
+    def _write(self, docs):
+        raise NotImplementedError
+
+
+class MongoBatchWriter(BatchWriter):
+    """Writes batches with insert_many(ordered=False) so one bad document doesn't stop the rest"""
+
+    def __init__(self, collection, **kwargs):
+        self.collection = collection
+        super().__init__(**kwargs)
+
+    def _write(self, docs):
+        from pymongo.errors import BulkWriteError
+        try:
+            result = self.collection.insert_many(docs, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details.get('writeErrors', [])
+            print(f"MongoBatchWriter: {len(errors)} of {len(docs)} documents rejected, e.g. {errors[0]['errmsg'] if errors else ''}")
+            return e.details.get('nInserted', 0)
+
+
+def couch_session(user, password, pool_size=4):
+    """A keep-alive requests.Session with basic auth, shared by everything talking to CouchDB"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    session.auth = (user, password)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class CouchBulkWriter(BatchWriter):
+    """Writes batches through CouchDB's _bulk_docs endpoint on a pooled session"""
+
+    def __init__(self, session, db_url, **kwargs):
+        self.session = session
+        self.bulk_url = f"{db_url.rstrip('/')}/_bulk_docs"
+        super().__init__(**kwargs)
+
+    def _write(self, docs):
+        response = self.session.post(self.bulk_url, json={'docs': docs})
+        if response.status_code not in (201, 202):
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text}")
+
+        # _bulk_docs answers with one result per document; failed ones carry an 'error' key
+        results = response.json()
+        errors = [r for r in results if 'error' in r]
+        if errors:
+            print(f"CouchBulkWriter: {len(errors)} of {len(docs)} documents rejected, e.g. {errors[0]['error']}: {errors[0].get('reason')}")
+        return len(results) - len(errors)
+
+
+PUSH_CHARS = '-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz'
+
+
+class PushIdGenerator:
+    """Generates Firebase-style push keys locally, in the same time-sortable format as ref.push()"""
+
+    def __init__(self):
+        self._last_ms = -1
+        self._random = []
+
+    def next_id(self):
+        now_ms = int(time.time() * 1000)
+        if now_ms == self._last_ms:
+            # Same millisecond: bump the random part so keys still sort in creation order
+            i = 11
+            while self._random[i] == 63:
+                self._random[i] = 0
+                i -= 1
+            self._random[i] += 1
+        else:
+            self._last_ms = now_ms
+            self._random = [random.randrange(64) for _ in range(12)]
+
+        time_chars = []
+        for _ in range(8):
+            time_chars.append(PUSH_CHARS[now_ms % 64])
+            now_ms //= 64
+        return ''.join(reversed(time_chars)) + ''.join(PUSH_CHARS[c] for c in self._random)
+
+
+class FirebaseBatchWriter(BatchWriter):
+    """Writes batches to a Realtime Database reference with one multi-path update() per batch"""
+
+    def __init__(self, ref, **kwargs):
+        self.ref = ref  # firebase_admin.db.Reference, or FakeFirebaseRef for offline testing
+        self.push_ids = PushIdGenerator()
+        super().__init__(**kwargs)
+
+    def _write(self, docs):
+        self.ref.update({self.push_ids.next_id(): doc for doc in docs})
+        return len(docs)
+
+
+class FakeFirebaseRef:
+    """Stand-in for a firebase_admin.db.Reference that keeps data in memory
+
+    latency simulates the HTTPS round trip of each update() call.
+    """
+
+    def __init__(self, latency=0.1):
+        self.latency = latency
+        self.data = {}
+        self.calls = 0
+
+    def update(self, value):
+        time.sleep(self.latency)
+        self.calls += 1
+        self.data.update(value)
+
+    def push(self, value):
+        self.update({PushIdGenerator().next_id(): value})
+
+    def get(self):
+        return dict(self.data)
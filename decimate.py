@@ -0,0 +1,66 @@
+import numpy as np
+
+# Downsampling for plots: keep the shape of a series (peaks included) with far fewer points.
+# Both functions return the indices of the points to keep, in order, so the same
+# selection can be applied to timestamps or any other column.
+
+
+def lttb(y, n_out, x=None):
+    """Largest-Triangle-Three-Buckets: pick n_out indices that best preserve the visual shape"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    # First and last points are always kept; the rest are split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third corner of the triangle
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            cx, cy = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            cx, cy = x[n - 1], y[n - 1]
+        # Pick the point in this bucket making the largest triangle with the previous pick
+        area = np.abs((x[a] - cx) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (cy - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax(y, n_out):
+    """Keep the min and max of each bucket (n_out // 2 buckets); fully vectorized, so it suits huge series"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    buckets = max(n_out // 2, 1)
+    if n_out >= n or n < 2 * buckets:
+        return np.arange(n)
+
+    # Pad to a whole number of buckets with NaN; NaNs (padding or gaps in the data) never win
+    # argmin/argmax, and buckets with nothing else in them are dropped
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    grid = padded.reshape(buckets, size)
+    missing = np.isnan(grid)
+    filled = ~missing.all(axis=1)
+    offsets = np.arange(buckets) * size
+    lo = offsets + np.argmin(np.where(missing, np.inf, grid), axis=1)
+    hi = offsets + np.argmax(np.where(missing, -np.inf, grid), axis=1)
+    return np.unique(np.concatenate([lo[filled], hi[filled], [0, n - 1]]))
+
+
+METHODS = {'lttb': lttb, 'minmax': minmax}
+
+
+def decimate(y, n_out, method='lttb'):
+    if method not in METHODS:
+        return np.arange(len(y))
+    return METHODS[method](y, n_out)
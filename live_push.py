@@ -0,0 +1,115 @@
+import collections
+import threading
+import time
+
+# Server-Sent-Events fan-out for the live dashboards.
+#
+# Instead of every browser polling the server (and the server rendering a
+# figure per poll), the newest data is encoded once per tick and pushed to all
+# connected browsers over one long-lived HTTP response each. SSE is plain HTTP,
+# so it runs on the Flask server inside every Dash app with no extra packages.
+
+
+class _Client:
+    def __init__(self):
+        self.events = collections.deque()
+        self.cond = threading.Condition()
+        self.resync = True  # Send a snapshot first
+
+
+class PushHub:
+    """Publishes events once and fans them out to every connected SSE client
+
+    Every client has its own small queue. publish() never waits for a
+    client: one that falls max_queued events behind has its queue dropped and
+    is sent a fresh snapshot() instead, so slow viewers skip ahead and the
+    producer is never held up by them.
+    """
+
+    def __init__(self, snapshot=None, max_queued=32, keepalive=15):
+        self.snapshot = snapshot  # () -> payload with the current state, sent on connect and after an overflow
+        self.max_queued = max_queued
+        self.keepalive = keepalive  # Seconds between comment lines on an idle stream, so proxies keep it open
+        self._clients = set()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.published = 0
+        self.resyncs = 0
+
+    def subscribe(self):
+        client = _Client()
+        with self._lock:
+            self._clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def publish(self, payload):
+        """Queue an already-encoded payload (a string) for every client"""
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            with client.cond:
+                if len(client.events) >= self.max_queued:
+                    # Too far behind: forget its backlog and bring it up to date in one go
+                    client.events.clear()
+                    client.resync = True
+                    self.resyncs += 1
+                else:
+                    client.events.append(payload)
+                client.cond.notify()
+        self.published += 1
+
+    def metrics(self):
+        return {'clients': len(self._clients), 'published': self.published, 'resyncs': self.resyncs}
+
+    def stream(self, client):
+        """Generator of SSE text for one client; unsubscribes it when the connection closes"""
+        try:
+            while True:
+                with client.cond:
+                    if not client.events and not client.resync:
+                        client.cond.wait(self.keepalive)
+                    resync, client.resync = client.resync, False
+                    batch = list(client.events)
+                    client.events.clear()
+                if resync and self.snapshot is not None:
+                    state = self.snapshot()
+                    if state is not None:
+                        batch.insert(0, state)
+                if not batch:
+                    yield ": keepalive\n\n"
+                for payload in batch:
+                    yield f"data: {payload}\n\n"
+        finally:
+            self.unsubscribe(client)
+
+    def attach(self, server, path='/stream'):
+        """Serve the event stream at `path` on a Flask server (a Dash app's app.server)"""
+        from flask import Response
+
+        def event_stream():
+            headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            return Response(self.stream(self.subscribe()), mimetype='text/event-stream', headers=headers)
+        server.add_url_rule(path, endpoint=f'push_hub{path}', view_func=event_stream)
+
+    def start_pump(self, poll, interval=0.1):
+        """Call poll() every `interval` seconds on one background thread and publish what it returns
+
+        poll() returns an encoded payload, or None when there is nothing new.
+        """
+        def run():
+            while True:
+                try:
+                    payload = poll()
+                    if payload is not None:
+                        self.publish(payload)
+                except Exception as e:
+                    print(f"PushHub: poll failed: {e}")
+                time.sleep(interval)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
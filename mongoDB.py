@@ -2,6 +2,8 @@ import paho.mqtt.client as mqtt
 import json
 from pymongo import MongoClient
 import pandas as pd
+from db_sinks import MongoBatchWriter
+from db_export import export_mongo
 
 # MQTT connection details
 mqttBroker = "27298008709441c5b8a12aac22fa02d9.s1.eu.hivemq.cloud"
@@ -15,6 +17,10 @@ mongoClient = MongoClient("mongodb://localhost:27017/")
 db = mongoClient["sensor_data"]
 collection = db["gyroscope"]
 
+# Writes are queued and sent with insert_many from a worker thread, so a slow
+# MongoDB never holds up the MQTT network loop
+writer = MongoBatchWriter(collection, batch_size=500, linger=0.5)
+
 # Callback when the client connects to the broker
 def on_connect(client, userdata, flags, rc, properties=None):
     if rc == 0:
@@ -30,17 +36,15 @@ def on_message(client, userdata, message):
         data = json.loads(payload)
         print(f"Received: {data}")
 
-        # Insert data into MongoDB
-        collection.insert_one(data)
-        print("Data inserted into MongoDB")
+        # Queue data for the MongoDB writer thread
+        writer.put(data)
     except json.JSONDecodeError as e:
         print(f"Error decoding JSON: {e}")
 
 # Function to query MongoDB and save data to CSV
+# Streams x/y/z/timestamp in batches and only reads documents newer than the last export
 def save_to_csv():
-    data = list(collection.find())
-    df = pd.DataFrame(data)
-    df.to_csv("gyroscope_data.csv", index=False)
+    export_mongo(collection, "gyroscope_data.csv", state_file="mongo_export_state.json")
     print("Data saved to gyroscope_data.csv")
 
 # Function to clean data and remove non-numeric or empty fields
@@ -73,6 +77,10 @@ time.sleep(1800)  # Adjust time as needed
 client.loop_stop()
 client.disconnect()
 
+# Flush anything still queued before exporting
+writer.close()
+print(f"MongoDB writer stats: {writer.metrics()}")
+
 # Save data to CSV and clean it
 save_to_csv()
 clean_data()
\ No newline at end of file
@@ -0,0 +1,307 @@
+import argparse
+import io
+import json
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from db_sinks import MongoBatchWriter, CouchBulkWriter, FirebaseBatchWriter, FakeFirebaseRef, couch_session
+
+# Offline benchmark for the MQTT gyro pipeline.
+#
+# Replays recorded gyro CSVs onto sensor/gyro and measures, per subscriber:
+# sustained messages/sec, end-to-end latency percentiles and drops.
+# By default everything runs against an in-process broker stand-in and fake
+# databases, so no network is needed:
+#   python mqtt_bench.py --rate 200 --duration 20
+#   python mqtt_bench.py --rate 1000 --burst 100 --subscribers print mongo couch firebase
+# To use a real local broker (e.g. mosquitto) and real databases instead:
+#   python mqtt_bench.py --broker localhost:1883 --mongo-url mongodb://localhost:27017/ --couch-url http://user:pw@localhost:5984
+# The print subscriber runs Task5.2.py's print into memory, so the time a
+# terminal takes to draw the text is not part of its numbers.
+TOPIC = "sensor/gyro"
+DEFAULT_CSVS = ['cleaned_gyroscope_data.csv', 'week6/gyroscope_data.csv']
+
+
+class Message:
+    """Just enough of paho's MQTTMessage for the on_message callbacks"""
+
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+class StandInBroker:
+    """In-process broker: every subscriber gets its own delivery thread and bounded queue
+
+    Like a real broker's per-client queue limit, a subscriber that falls more
+    than max_queued messages behind loses the newest ones.
+    """
+
+    def __init__(self, max_queued=1000):
+        self.max_queued = max_queued
+        self.subscribers = []
+
+    def subscribe(self, topic, on_message):
+        sub = {'topic': topic, 'on_message': on_message, 'queue': queue.Queue(self.max_queued), 'dropped': 0}
+        sub['thread'] = threading.Thread(target=self._deliver, args=(sub,), daemon=True)
+        sub['thread'].start()
+        self.subscribers.append(sub)
+        return sub
+
+    def publish(self, topic, payload):
+        for sub in self.subscribers:
+            if sub['topic'] == topic:
+                try:
+                    sub['queue'].put_nowait(Message(topic, payload))
+                except queue.Full:
+                    sub['dropped'] += 1
+
+    def drain(self, timeout=30):
+        deadline = time.time() + timeout
+        for sub in self.subscribers:
+            while not sub['queue'].empty() and time.time() < deadline:
+                time.sleep(0.05)
+
+    def _deliver(self, sub):
+        while True:
+            message = sub['queue'].get()
+            sub['on_message'](None, None, message)
+
+
+class PahoBroker:
+    """Same interface as StandInBroker, backed by a real MQTT broker through paho"""
+
+    def __init__(self, address):
+        import paho.mqtt.client as mqtt
+        self.mqtt = mqtt
+        host, _, port = address.partition(':')
+        self.host, self.port = host, int(port or 1883)
+        self.publisher = self._client()
+        self.publisher.loop_start()
+        self.clients = []
+        self.subscribers = []
+
+    def _client(self):
+        client = self.mqtt.Client(self.mqtt.CallbackAPIVersion.VERSION2)
+        client.connect(self.host, self.port)
+        return client
+
+    def subscribe(self, topic, on_message):
+        client = self._client()
+        client.on_message = on_message
+        client.subscribe(topic)
+        client.loop_start()
+        self.clients.append(client)
+        sub = {'dropped': 0}  # Broker-side drops show up as messages that never arrive
+        self.subscribers.append(sub)
+        return sub
+
+    def publish(self, topic, payload):
+        self.publisher.publish(topic, payload)
+
+    def drain(self, timeout=5):
+        time.sleep(min(timeout, 2))
+        for client in self.clients + [self.publisher]:
+            client.loop_stop()
+            client.disconnect()
+
+
+class FakeCollection:
+    """MongoDB collection stand-in with a fixed round-trip time per call"""
+
+    def __init__(self, latency=0.005):
+        self.latency = latency
+        self.count = 0
+
+    def insert_many(self, docs, ordered=True):
+        time.sleep(self.latency)
+        self.count += len(docs)
+
+        class Result:
+            inserted_ids = list(range(len(docs)))
+        return Result()
+
+
+class FakeCouchSession:
+    """requests.Session stand-in that accepts every _bulk_docs write after a fixed round trip"""
+
+    def __init__(self, latency=0.01):
+        self.latency = latency
+
+    def post(self, url, json):
+        time.sleep(self.latency)
+
+        class Response:
+            status_code = 201
+            text = ''
+
+            def json(self_):
+                return [{'ok': True, 'id': str(i), 'rev': '1-0'} for i in range(len(json['docs']))]
+        return Response()
+
+
+class Subscriber:
+    """One benchmarked consumer: counts messages and records end-to-end latency"""
+
+    def __init__(self, name, writer=None):
+        self.name = name
+        self.writer = writer  # A db_sinks.BatchWriter, or None to measure at message delivery
+        self.received = 0
+        self.completed = 0
+        self.bad = 0
+        self.latencies = []  # Nanoseconds from publish to delivery (or to database write)
+        self.first_ns = None
+        self.last_ns = None
+        self.console = io.StringIO()  # Where the print subscriber's output goes instead of the terminal
+        self._lock = threading.Lock()
+        if writer is not None:
+            self._instrument(writer)
+
+    def on_message(self, client, userdata, message):
+        # Mirrors the scripts' on_message: decode, parse JSON, hand off
+        try:
+            data = json.loads(message.payload.decode())
+        except json.JSONDecodeError:
+            self.bad += 1
+            return
+        self.received += 1
+        if self.writer is None:
+            # Same print as Task5.2.py, into a StringIO so the terminal's speed doesn't skew the numbers
+            x = data.get('x', 0)
+            y = data.get('y', 0)
+            z = data.get('z', 0)
+            print(f"Gyroscope Data - x: {x:.2f}, y: {y:.2f}, z: {z:.2f}", file=self.console)
+            self._record([data['sent_ns']])
+        else:
+            self.writer.put(data)
+
+    def _instrument(self, writer):
+        # Time each document when its batch has actually been written
+        original = writer._write
+
+        def timed_write(docs):
+            stored = original(docs)
+            self._record([d['sent_ns'] for d in docs])
+            return stored
+        writer._write = timed_write
+
+    def _record(self, sent):
+        now = time.time_ns()
+        with self._lock:
+            self.latencies.extend(now - s for s in sent)
+            self.completed += len(sent)
+            if self.first_ns is None:
+                self.first_ns = min(sent)
+            self.last_ns = now
+
+    def report(self, published, broker_dropped):
+        lat_ms = np.array(self.latencies) / 1e6 if self.latencies else np.zeros(1)
+        elapsed = (self.last_ns - self.first_ns) / 1e9 if self.first_ns and self.last_ns > self.first_ns else 0
+        writer_dropped = self.writer.dropped + self.writer.failed if self.writer else 0
+        return {
+            'subscriber': self.name,
+            'published': published,
+            'completed': self.completed,
+            'dropped': published - self.completed,
+            'broker_dropped': broker_dropped,
+            'sink_dropped': writer_dropped,
+            'msgs_per_sec': round(self.completed / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': round(float(np.percentile(lat_ms, 50)), 2),
+            'p95_ms': round(float(np.percentile(lat_ms, 95)), 2),
+            'p99_ms': round(float(np.percentile(lat_ms, 99)), 2),
+            'max_ms': round(float(lat_ms.max()), 2),
+        }
+
+
+def load_samples(paths):
+    """x, y, z rows from the recorded gyro CSVs, ignoring _id/_rev and blank rows"""
+    frames = [pd.read_csv(p)[['x', 'y', 'z']] for p in paths]
+    df = pd.concat(frames).apply(pd.to_numeric, errors='coerce').dropna()
+    return df.to_numpy().tolist()
+
+
+def replay(broker, samples, rate, burst, duration):
+    """Publish samples in bursts of `burst` messages, averaging `rate` messages/sec"""
+    interval = burst / rate
+    published = 0
+    start = time.perf_counter()
+    next_send = start
+    while time.perf_counter() - start < duration:
+        for _ in range(burst):
+            x, y, z = samples[published % len(samples)]
+            payload = json.dumps({'x': x, 'y': y, 'z': z, 'sent_ns': time.time_ns()}).encode()
+            broker.publish(TOPIC, payload)
+            published += 1
+        next_send += interval
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    return published, time.perf_counter() - start
+
+
+def build_subscribers(names, args):
+    subs = []
+    for name in names:
+        if name == 'print':
+            subs.append(Subscriber('print'))
+        elif name == 'mongo':
+            if args.mongo_url:
+                from pymongo import MongoClient
+                collection = MongoClient(args.mongo_url)['sensor_bench']['gyroscope']
+            else:
+                collection = FakeCollection(args.db_latency)
+            subs.append(Subscriber('mongo', MongoBatchWriter(collection, batch_size=args.batch_size, linger=args.linger)))
+        elif name == 'couch':
+            if args.couch_url:
+                import requests
+                parsed = requests.utils.urlparse(args.couch_url)
+                session = couch_session(parsed.username, parsed.password)
+                db_url = f"{parsed.scheme}://{parsed.hostname}:{parsed.port or 5984}/sensor_bench"
+                session.put(db_url)
+            else:
+                session, db_url = FakeCouchSession(args.db_latency), 'http://fake/sensor_bench'
+            subs.append(Subscriber('couch', CouchBulkWriter(session, db_url, batch_size=args.batch_size, linger=args.linger)))
+        elif name == 'firebase':
+            writer = FirebaseBatchWriter(FakeFirebaseRef(args.db_latency), batch_size=args.batch_size, linger=args.linger)
+            subs.append(Subscriber('firebase', writer))
+    return subs
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay recorded gyro data over MQTT and measure each subscriber")
+    parser.add_argument('--csv', nargs='+', default=DEFAULT_CSVS, help="Recorded gyro CSVs to replay")
+    parser.add_argument('--rate', type=float, default=100, help="Average messages per second")
+    parser.add_argument('--burst', type=int, default=1, help="Messages sent back to back in each burst")
+    parser.add_argument('--duration', type=float, default=10, help="Seconds to publish for")
+    parser.add_argument('--subscribers', nargs='+', default=['print', 'mongo', 'couch', 'firebase'],
+                        choices=['print', 'mongo', 'couch', 'firebase'])
+    parser.add_argument('--broker', help="host[:port] of a real MQTT broker; default is the in-process stand-in")
+    parser.add_argument('--max-queued', type=int, default=1000, help="Per-subscriber queue limit of the stand-in broker")
+    parser.add_argument('--mongo-url', help="Benchmark a real MongoDB instead of the fake collection")
+    parser.add_argument('--couch-url', help="Benchmark a real CouchDB (http://user:pw@host:port) instead of the fake one")
+    parser.add_argument('--db-latency', type=float, default=0.01, help="Round trip of the fake databases (seconds)")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--linger', type=float, default=0.5)
+    args = parser.parse_args()
+
+    samples = load_samples(args.csv)
+    broker = PahoBroker(args.broker) if args.broker else StandInBroker(args.max_queued)
+    subs = build_subscribers(args.subscribers, args)
+    handles = [broker.subscribe(TOPIC, sub.on_message) for sub in subs]
+    time.sleep(0.5)  # Let real subscribers finish connecting
+
+    print(f"Replaying {len(samples)} samples at {args.rate}/s in bursts of {args.burst} for {args.duration}s...")
+    published, elapsed = replay(broker, samples, args.rate, args.burst, args.duration)
+    print(f"Published {published} messages in {elapsed:.1f}s ({published / elapsed:.1f} msgs/s)")
+
+    broker.drain()
+    for sub in subs:
+        if sub.writer is not None:
+            sub.writer.close()
+
+    report = pd.DataFrame([sub.report(published, handle['dropped']) for sub, handle in zip(subs, handles)])
+    print(report.to_string(index=False))
@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import time
+
+import serial_asyncio  # pip install pyserial-asyncio
+
+from csv_sink import BufferedCSVSink
+from serial_ingest import Batch, PROFILES, parse_lines, spread_timestamps
+
+# Example: python multi_serial.py COM7:dht22 COM8:gyro:115200 COM9:gyro:115200:gyro_rack
+# Each port is PORT:PROFILE[:BAUD[:DEVICE]]; ports with the same DEVICE share one <DEVICE>.csv
+DEFAULT_BAUD = 9600
+CHUNK_SIZE = 65536
+STATS_INTERVAL = 10  # Seconds between stats printouts
+TICK_INTERVAL = 0.5  # Seconds between checks for buffered rows that are due to be written
+
+
+def parse_port_spec(spec):
+    """Turn PORT:PROFILE[:BAUD[:DEVICE]] into a dict"""
+    parts = spec.split(':')
+    if len(parts) < 2 or parts[1] not in PROFILES:
+        raise argparse.ArgumentTypeError(f"Expected PORT:PROFILE[:BAUD[:DEVICE]] with PROFILE one of {list(PROFILES)}, got {spec}")
+    return {
+        'port': parts[0],
+        'profile': parts[1],
+        'baud': int(parts[2]) if len(parts) > 2 and parts[2] else DEFAULT_BAUD,
+        'device': parts[3] if len(parts) > 3 else parts[1],
+    }
+
+
+class PortStats:
+    def __init__(self, port):
+        self.port = port
+        self.lines = 0
+        self.samples = 0
+        self.garbled = 0
+        self.errors = 0
+
+
+async def read_port(spec, sink, stats):
+    """Read one serial port forever, parsing whatever arrives and writing it to the device sink"""
+    profile = PROFILES[spec['profile']]
+    columns = profile['columns']
+    while True:
+        try:
+            reader, writer = await serial_asyncio.open_serial_connection(url=spec['port'], baudrate=spec['baud'])
+        except Exception as e:
+            stats.errors += 1
+            print(f"[{spec['port']}] Could not open port: {e}; retrying in 5 seconds")
+            await asyncio.sleep(5)
+            continue
+
+        print(f"[{spec['port']}] Reading {spec['profile']} data at {spec['baud']} baud into {spec['device']}.csv")
+        pending = b''
+        previous = None  # When the last chunk arrived, so a chunk's samples can be spread since then
+        try:
+            while True:
+                data = await reader.read(CHUNK_SIZE)
+                if not data:
+                    raise ConnectionError("port closed")
+                received = time.time_ns()
+                previous, start = received, previous
+
+                # Keep the partial last line around until the rest of it arrives
+                lines = (pending + data).split(b'\n')
+                pending = lines.pop()
+                if not lines:
+                    continue
+
+                values, garbled = parse_lines(lines, len(columns), profile['dtype'])
+                stats.lines += len(lines)
+                stats.garbled += garbled
+                stats.samples += len(values)
+                if len(values):
+                    sink.write(Batch(spread_timestamps(start, received, len(values)), values, columns))
+        except Exception as e:
+            stats.errors += 1
+            print(f"[{spec['port']}] Read failed: {e}; reopening")
+            writer.close()
+            await asyncio.sleep(1)
+
+
+async def print_stats(all_stats):
+    while True:
+        await asyncio.sleep(STATS_INTERVAL)
+        for s in all_stats:
+            print(f"[{s.port}] lines={s.lines} samples={s.samples} garbled={s.garbled} errors={s.errors}")
+
+
+async def tick_sinks(sinks):
+    # Buffered rows reach the CSV within the sink's flush_interval even when a device goes quiet
+    while True:
+        await asyncio.sleep(TICK_INTERVAL)
+        for sink in sinks:
+            sink.tick()
+
+
+async def main(specs):
+    # One shared sink per device, however many ports feed it
+    sinks = {}
+    profiles = {}
+    for spec in specs:
+        if profiles.setdefault(spec['device'], spec['profile']) != spec['profile']:
+            raise SystemExit(f"Device {spec['device']} is fed by ports with different profiles")
+        if spec['device'] not in sinks:
+            columns = PROFILES[spec['profile']]['columns']
+            sinks[spec['device']] = BufferedCSVSink(f"{spec['device']}.csv", ['Timestamp'] + columns)
+
+    all_stats = [PortStats(spec['port']) for spec in specs]
+    tasks = [asyncio.create_task(read_port(spec, sinks[spec['device']], stats))
+             for spec, stats in zip(specs, all_stats)]
+    tasks.append(asyncio.create_task(print_stats(all_stats)))
+    tasks.append(asyncio.create_task(tick_sinks(list(sinks.values()))))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for sink in sinks.values():
+            sink.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Read many Arduino serial ports from one process")
+    parser.add_argument('ports', nargs='+', type=parse_port_spec, help="PORT:PROFILE[:BAUD[:DEVICE]]")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args.ports))
+    except KeyboardInterrupt:
+        print("\nData collection stopped.")
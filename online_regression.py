@@ -0,0 +1,122 @@
+import json
+import math
+import os
+
+import numpy as np
+
+# Streaming simple linear regression (y = slope * x + intercept).
+#
+# Keeps weighted running means and co-moments of x and y, updated Welford-style
+# per sample, which gives exactly the least-squares line of everything seen so
+# far, the same answer recursive least squares converges to for one feature
+# plus an intercept, in O(1) per sample. With forgetting < 1, older samples are
+# down-weighted geometrically, so the line tracks slow drift (effective memory
+# of about 1 / (1 - forgetting) samples).
+
+
+class OnlineLinearRegression:
+    """Least-squares fit of y on x, updated one sample at a time"""
+
+    def __init__(self, x_column='Temperature', y_column='Humidity', forgetting=1.0, state_file=None):
+        self.x_column = x_column
+        self.y_column = y_column
+        self.forgetting = forgetting
+        self.state_file = state_file  # If set, the model is saved here after every batch for other scripts to read
+        self.n = 0  # Samples seen
+        self.weight = 0.0  # Sum of sample weights (equals n without forgetting)
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.sxx = 0.0  # Weighted sums of squared/cross deviations from the means
+        self.syy = 0.0
+        self.sxy = 0.0
+        self.min_x = math.inf
+        self.max_x = -math.inf
+
+    def update(self, x, y):
+        if math.isnan(x) or math.isnan(y):
+            return
+        if self.forgetting < 1.0:
+            self.weight *= self.forgetting
+            self.sxx *= self.forgetting
+            self.syy *= self.forgetting
+            self.sxy *= self.forgetting
+        self.n += 1
+        self.weight += 1.0
+        dx = x - self.mean_x
+        dy = y - self.mean_y
+        self.mean_x += dx / self.weight
+        self.mean_y += dy / self.weight
+        self.sxx += dx * (x - self.mean_x)
+        self.syy += dy * (y - self.mean_y)
+        self.sxy += dx * (y - self.mean_y)
+        self.min_x = min(self.min_x, x)
+        self.max_x = max(self.max_x, x)
+
+    def update_many(self, xs, ys):
+        for x, y in zip(np.asarray(xs, dtype=np.float64).tolist(), np.asarray(ys, dtype=np.float64).tolist()):
+            self.update(x, y)
+
+    def write(self, batch):
+        # Lets the model be used as a serial_ingest.SerialIngest sink
+        xi, yi = batch.columns.index(self.x_column), batch.columns.index(self.y_column)
+        self.update_many(batch.values[:, xi], batch.values[:, yi])
+        if self.state_file:
+            self.save(self.state_file)
+
+    def close(self):
+        if self.state_file:
+            self.save(self.state_file)
+
+    # ---- Model ----
+
+    @property
+    def slope(self):
+        return self.sxy / self.sxx if self.sxx > 0 else math.nan
+
+    @property
+    def intercept(self):
+        return self.mean_y - self.slope * self.mean_x
+
+    @property
+    def r2(self):
+        if self.sxx <= 0 or self.syy <= 0:
+            return math.nan
+        return self.sxy ** 2 / (self.sxx * self.syy)
+
+    @property
+    def residual_std(self):
+        """Standard deviation of the residuals (n - 2 degrees of freedom, weighted)"""
+        if self.weight <= 2 or self.sxx <= 0:
+            return math.nan
+        sse = max(self.syy - self.sxy ** 2 / self.sxx, 0.0)
+        return math.sqrt(sse / (self.weight - 2))
+
+    def predict(self, x):
+        return self.slope * np.asarray(x, dtype=np.float64) + self.intercept
+
+    def summary(self):
+        return {'n': self.n, 'slope': self.slope, 'intercept': self.intercept,
+                'r2': self.r2, 'residual_std': self.residual_std}
+
+    # ---- Saving ----
+
+    def save(self, path):
+        # Write to a temp file and rename so readers never see a half-written model
+        state = dict(vars(self))
+        state.pop('state_file')
+        state['min_x'] = None if self.n == 0 else self.min_x
+        state['max_x'] = None if self.n == 0 else self.max_x
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            state = json.load(f)
+        model = cls(state['x_column'], state['y_column'], state['forgetting'])
+        vars(model).update(state)
+        model.min_x = math.inf if state['min_x'] is None else state['min_x']
+        model.max_x = -math.inf if state['max_x'] is None else state['max_x']
+        return model
@@ -0,0 +1,206 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+from column_store import ColumnStore, CHUNK_ROWS, has_store
+
+# Multi-resolution summaries for zooming through long sensor histories.
+#
+# Level k holds one row per 2**k consecutive samples: the bucket's first
+# timestamp, its sample count and the min, max and mean of every column. Each
+# level is its own column store, so time ranges are read the same way:
+#   gyro_store/pyramid/pyramid.json
+#   gyro_store/pyramid/level_01/...   2 samples per row
+#   gyro_store/pyramid/level_02/...   4 samples per row
+#   ...
+# Levels are built as samples arrive (level k from pairs of level k-1 rows), so
+# a plot of any time range can read about one row per pixel instead of every sample.
+LEVELS = 16
+META_FILE = 'pyramid.json'
+STATS = ('min', 'max', 'mean')
+
+
+def _pairs(entry):
+    # Combine consecutive pairs of buckets into buckets twice the size
+    ts, count, lo, hi, total = entry
+    return (ts[0::2], count[0::2] + count[1::2], np.fmin(lo[0::2], lo[1::2]),
+            np.fmax(hi[0::2], hi[1::2]), total[0::2] + total[1::2])
+
+
+def _merge_all(entry):
+    # Collapse every bucket in entry into one (used for the final partial bucket on close)
+    ts, count, lo, hi, total = entry
+    return ts[:1], count.sum(keepdims=True), lo.min(axis=0, keepdims=True), \
+        hi.max(axis=0, keepdims=True), total.sum(axis=0, keepdims=True)
+
+
+def _concat(a, b):
+    if a is None or b is None:
+        return b if a is None else a
+    return tuple(np.concatenate([x, y]) for x, y in zip(a, b))
+
+
+class Pyramid:
+    """Writer/reader for the min/max/mean/count levels of a sensor log
+
+    Feed it the same rows as the raw store, with append() or as a
+    serial_ingest.SerialIngest sink. close() writes out the incomplete bucket
+    at the end of every level, so no sample is left out of any level.
+    """
+
+    def __init__(self, path, columns=None, levels=LEVELS, flush_interval=None):
+        self.path = path
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if columns is not None and list(columns) != meta['columns']:
+                raise ValueError(f"{path} has columns {meta['columns']}, not {list(columns)}")
+        elif columns is None:
+            raise FileNotFoundError(f"No pyramid at {path}")
+        else:
+            os.makedirs(path, exist_ok=True)
+            meta = {'columns': list(columns), 'levels': levels}
+            with open(meta_path, 'w') as f:
+                json.dump(meta, f)
+
+        self.columns = meta['columns']
+        self.levels = meta['levels']
+        level_columns = ['count'] + [f"{c}_{s}" for c in self.columns for s in STATS]
+        # Level k's chunks cover CHUNK_ROWS raw samples, like a raw chunk, up to k = 10; coarser levels stop
+        # at 64 rows and take longer to fill. While recording, flush_interval publishes the rows every level
+        # has so far (as its store's tail), so a live overview doesn't wait for full chunks
+        self.stores = [ColumnStore(self._level_path(k), level_columns, max(64, CHUNK_ROWS >> k), flush_interval)
+                       for k in range(1, self.levels + 1)]
+        self._pending = [None] * self.levels  # Unpaired bucket waiting at the input of each level
+
+    def _level_path(self, level):
+        return os.path.join(self.path, f"level_{level:02d}")
+
+    # ---- Writing ----
+
+    def append(self, timestamps, values):
+        """Add raw rows; timestamps are epoch ns and must not go backwards"""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(timestamps), len(self.columns))
+        entry = (timestamps, np.ones(len(timestamps)), values, values, values)
+        for k in range(self.levels):
+            entry = _concat(self._pending[k], entry)
+            n = len(entry[0])
+            self._pending[k] = tuple(x[n - n % 2:] for x in entry) if n % 2 else None
+            entry = _pairs(tuple(x[:n - n % 2] for x in entry))
+            if not len(entry[0]):
+                break
+            self._store(k, entry)
+
+    def write(self, batch):
+        # Lets the pyramid be used directly as a serial_ingest.SerialIngest sink
+        self.append(batch.timestamps, batch.values)
+
+    def _store(self, k, entry):
+        ts, count, lo, hi, total = entry
+        mean = total / count[:, None]
+        stats = np.stack([lo, hi, mean], axis=2).reshape(len(ts), -1)  # x_min, x_max, x_mean, y_min, ...
+        self.stores[k].append(ts, np.column_stack([count, stats]))
+
+    def tick(self):
+        # Called by SerialIngest, so levels are published on time even when no new samples arrive
+        for store in self.stores:
+            store.tick()
+
+    def flush(self):
+        for store in self.stores:
+            store.flush()
+
+    def close(self):
+        # The leftovers of each level, plus everything still pending below it, form its last bucket
+        carry = None
+        for k in range(self.levels):
+            entry = _concat(self._pending[k], carry)
+            self._pending[k] = None
+            if entry is not None and len(entry[0]):
+                carry = _merge_all(entry)
+                self._store(k, carry)
+        for store in self.stores:
+            store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- Reading ----
+
+    def reload(self):
+        """Pick up chunks written by another process"""
+        for store in self.stores:
+            store.reload()
+
+    def time_range(self):
+        return self.stores[0].time_range()
+
+    def pick_level(self, start, end, width):
+        """Finest level with at most about `width` rows between start and end (0 means raw samples)"""
+        first, last = self.time_range()
+        if first is None:
+            return 0
+        start = first if start is None else max(start, first)
+        end = last if end is None else min(end, last)
+        span = max(last - first, 1)
+        samples = 2 * len(self.stores[0]) * max(end - start, 0) / span  # Level 1 has one row per 2 samples
+        for k in range(self.levels + 1):
+            if samples / 2 ** k <= width:
+                return k
+        return self.levels
+
+    def read(self, level, start=None, end=None):
+        """DataFrame of one level between start and end (epoch ns), with a datetime 'timestamp' column"""
+        return self.stores[level - 1].read_frame(start, end)
+
+    def read_for_width(self, start=None, end=None, width=1000, raw_store=None):
+        """(level, DataFrame) with about `width` rows covering start..end
+
+        When the range is short enough to show every sample, the raw rows are
+        read from raw_store (if given) and returned with min = max = mean.
+        """
+        level = self.pick_level(start, end, width)
+        if level == 0:
+            if raw_store is not None:
+                raw = raw_store.read_frame(start, end, self.columns)
+                df = raw[['timestamp']].copy()
+                df['count'] = 1.0
+                for c in self.columns:
+                    for s in STATS:
+                        df[f"{c}_{s}"] = raw[c]
+                return 0, df
+            level = 1
+        return level, self.read(level, start, end)
+
+
+def has_pyramid(path):
+    return os.path.exists(os.path.join(path, META_FILE))
+
+
+def build_pyramid(store_path, pyramid_path=None, levels=LEVELS):
+    """Build (or rebuild) the pyramid of an existing column store, one chunk at a time"""
+    import shutil
+    store = ColumnStore(store_path)
+    pyramid_path = pyramid_path or os.path.join(store_path, 'pyramid')
+    if os.path.exists(pyramid_path):
+        shutil.rmtree(pyramid_path)
+    with Pyramid(pyramid_path, store.columns, levels) as pyramid:
+        for chunk in store.segments():
+            load = lambda col: np.load(os.path.join(store_path, f"{chunk['name']}.{col}.npy"))
+            pyramid.append(load('timestamp'), np.column_stack([load(c) for c in store.columns]))
+    print(f"Built a {levels}-level pyramid of {len(store)} rows in {pyramid_path}")
+
+
+if __name__ == '__main__':
+    # Usage: python pyramid.py store_dir [levels]
+    if len(sys.argv) < 2 or not has_store(sys.argv[1]):
+        print("Usage: python pyramid.py <store dir> [levels]")
+        sys.exit(1)
+    build_pyramid(sys.argv[1], levels=int(sys.argv[2]) if len(sys.argv) > 2 else LEVELS)
@@ -0,0 +1,89 @@
+import threading
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity, thread-safe buffer of the latest samples, backed by NumPy arrays
+
+    Every column is stored twice over (a 2 * capacity array where each sample is
+    written at i and i + capacity), so the newest `capacity` samples are always
+    one contiguous slice. That keeps append O(1) and lets snapshot() hand out
+    views without copying. `seq` counts every sample ever appended.
+    """
+
+    def __init__(self, capacity, columns, dtype=np.float64):
+        self.capacity = capacity
+        self.columns = list(columns)
+        dtypes = dtype if isinstance(dtype, dict) else {c: dtype for c in self.columns}
+        self._data = {c: np.zeros(2 * capacity, dtype=dtypes.get(c, np.float64)) for c in self.columns}
+        self._lock = threading.Lock()
+        self.seq = 0
+
+    def __len__(self):
+        return min(self.seq, self.capacity)
+
+    def append(self, *values):
+        """Append one sample, given in column order"""
+        with self._lock:
+            i = self.seq % self.capacity
+            for col, value in zip(self.columns, values):
+                data = self._data[col]
+                data[i] = value
+                data[i + self.capacity] = value
+            self.seq += 1
+
+    def extend(self, arrays):
+        """Append many samples at once from a {column: array} dict"""
+        with self._lock:
+            n = len(arrays[self.columns[0]])
+            if n > self.capacity:  # Only the newest capacity samples can be kept anyway
+                arrays = {c: arrays[c][-self.capacity:] for c in self.columns}
+                self.seq += n - self.capacity
+                n = self.capacity
+            idx = (self.seq + np.arange(n)) % self.capacity
+            for col in self.columns:
+                data = self._data[col]
+                data[idx] = arrays[col]
+                data[idx + self.capacity] = arrays[col]
+            self.seq += n
+
+    def snapshot(self, columns=None, last=None):
+        """Return (seq, {column: view}) of the newest `last` samples, oldest first
+
+        The arrays are views into the buffer: the newest samples stay valid, but a
+        writer will overwrite the oldest ones, so copy() anything you keep. For a
+        copy that is guaranteed consistent with seq, use since(), which copies
+        under the lock.
+        """
+        with self._lock:
+            return self._window(columns or self.columns, last)
+
+    def _window(self, columns, last=None):
+        # Call with the lock held
+        seq = self.seq
+        n = min(seq, self.capacity) if last is None else min(last, seq, self.capacity)
+        end = (seq - 1) % self.capacity + self.capacity + 1 if seq else 0
+        return seq, {c: self._data[c][end - n:end] for c in columns}
+
+    def __getitem__(self, column):
+        # buffer['x'] gives the current window of one column, like the old dict-of-lists buffers
+        return self.snapshot([column])[1][column]
+
+    def since(self, seq, columns=None, dtype=np.float32):
+        """Samples appended after sequence number seq, as (new_seq, (len(columns), n) array, reset)
+
+        reset is True when the caller is too far behind (or ahead, after a restart)
+        and should redraw from the whole window, which is what is returned then.
+        """
+        columns = columns or self.columns
+        # The copy is made under the lock too, so a writer can't overwrite rows while they are copied
+        with self._lock:
+            current, views = self._window(columns)
+            new = current - seq
+            reset = new > len(self) or new < 0
+            n = len(self) if reset else new
+            data = np.empty((len(columns), n), dtype=dtype)
+            for i, col in enumerate(columns):
+                data[i] = views[col][len(views[col]) - n:]
+        return current, data, reset
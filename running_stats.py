@@ -0,0 +1,165 @@
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Summary statistics and correlations for any row range without rescanning the rows.
+#
+# Rows are grouped into fixed-size chunks and each finished chunk keeps its
+# moments: per-column count, mean, sum of squared deviations (M2), min and max,
+# plus the mean and co-moment matrix of its complete rows (for covariance and
+# correlation). Moments of neighbouring chunks merge exactly (Chan/Welford), so
+# a range summary combines the chunks it covers and only scans the rows at its
+# two ragged ends.
+
+
+def chunk_moments(values):
+    """Moments of a 2-D block of rows; missing values (NaN) are skipped like pandas does"""
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0).astype(np.float64)
+    mean = np.divide(np.where(valid, values, 0.0).sum(axis=0), count,
+                     out=np.zeros(values.shape[1]), where=count > 0)
+    m2 = (np.where(valid, values - mean, 0.0) ** 2).sum(axis=0)
+    lo = np.where(valid, values, np.inf).min(axis=0, initial=np.inf)
+    hi = np.where(valid, values, -np.inf).max(axis=0, initial=-np.inf)
+
+    # Covariance only uses rows where every column is present, as in DataFrame.corr() with no gaps
+    complete = values[valid.all(axis=1)]
+    rows = float(len(complete))
+    row_mean = complete.mean(axis=0) if len(complete) else np.zeros(values.shape[1])
+    dev = complete - row_mean
+    comoment = dev.T @ dev
+    return count, mean, m2, lo, hi, rows, row_mean, comoment
+
+
+def combine_moments(count, mean, m2, lo, hi, rows, row_mean, comoment):
+    """Merge moments stacked along the first axis (one entry per chunk) into one set"""
+    total = count.sum(axis=0)
+    total_mean = np.divide((count * mean).sum(axis=0), total, out=np.zeros(mean.shape[1]), where=total > 0)
+    total_m2 = m2.sum(axis=0) + (count * (mean - total_mean) ** 2).sum(axis=0)
+
+    total_rows = rows.sum()
+    total_row_mean = (rows[:, None] * row_mean).sum(axis=0) / total_rows if total_rows else np.zeros(mean.shape[1])
+    dev = row_mean - total_row_mean
+    total_comoment = comoment.sum(axis=0) + np.einsum('k,ki,kj->ij', rows, dev, dev)
+    return total, total_mean, total_m2, lo.min(axis=0), hi.max(axis=0), total_rows, total_row_mean, total_comoment
+
+
+class ChunkedStats:
+    """Keeps the rows of a growing table plus per-chunk moments for fast range summaries
+
+    Feed rows with extend() (or sync() with the whole frame), then ask for
+    describe(start, end) or corr(start, end) over any row range.
+    """
+
+    def __init__(self, columns, chunk_rows=1024):
+        self.columns = list(columns)
+        self.chunk_rows = chunk_rows
+        self._lock = threading.RLock()  # May be shared by several dashboard sessions
+        self.reset()
+
+    def reset(self):
+        d = len(self.columns)
+        self.rows = 0
+        self._values = np.empty((self.chunk_rows, d))
+        self._chunks = 0
+        self._moments = [np.empty((0, d)), np.empty((0, d)), np.empty((0, d)), np.empty((0, d)),
+                         np.empty((0, d)), np.empty(0), np.empty((0, d)), np.empty((0, d, d))]
+
+    def extend(self, frame):
+        """Append rows (a DataFrame with self.columns, or a 2-D array in column order)"""
+        values = frame[self.columns].to_numpy(dtype=np.float64) if isinstance(frame, pd.DataFrame) \
+            else np.asarray(frame, dtype=np.float64)
+        with self._lock:
+            if self.rows + len(values) > len(self._values):
+                grown = np.empty((max(2 * len(self._values), self.rows + len(values)), len(self.columns)))
+                grown[:self.rows] = self._values[:self.rows]
+                self._values = grown
+            self._values[self.rows:self.rows + len(values)] = values
+            self.rows += len(values)
+
+            # Moments for every chunk that is now full
+            full = self.rows // self.chunk_rows
+            if full > self._chunks:
+                new = [chunk_moments(self._values[i * self.chunk_rows:(i + 1) * self.chunk_rows])
+                       for i in range(self._chunks, full)]
+                self._moments = [np.concatenate([old, np.stack(parts)])
+                                 for old, parts in zip(self._moments, zip(*new))]
+                self._chunks = full
+
+    def sync(self, frame, reset=False):
+        """Catch up with a frame that only ever grows at the end; reset=True starts over from it"""
+        with self._lock:
+            if reset or len(frame) < self.rows:
+                self.reset()
+            if len(frame) > self.rows:
+                self.extend(frame.iloc[self.rows:])
+
+    def _range(self, start, end):
+        # Clamp like iloc does, with negative indices counting from the end
+        start, end, _ = slice(start, end).indices(self.rows)
+        return start, max(start, end)
+
+    def moments(self, start=0, end=None):
+        """Combined moments of rows [start, end)"""
+        with self._lock:
+            start, end = self._range(start, end)
+            first = -(-start // self.chunk_rows)  # First chunk starting at or after start
+            last = end // self.chunk_rows  # Chunks before this one end before end
+            parts = []
+            if first < last:
+                parts.append([m[first:last] for m in self._moments])
+                edges = [(start, first * self.chunk_rows), (last * self.chunk_rows, end)]
+            else:
+                edges = [(start, end)]
+            for a, b in edges:
+                if b > a:
+                    parts.append([np.asarray(m)[None] for m in chunk_moments(self._values[a:b])])
+            if not parts:
+                parts.append([np.asarray(m)[None] for m in chunk_moments(self._values[:0])])
+            return combine_moments(*[np.concatenate(ms) for ms in zip(*parts)])
+
+    def describe(self, start=0, end=None, columns=None, quartiles=True):
+        """Same layout as DataFrame.describe() for rows [start, end)
+
+        count/mean/std/min/max come from the chunk moments. The quartiles are
+        not mergeable, so they are read from the rows in the range (one
+        np.nanpercentile call); pass quartiles=False to skip them.
+        """
+        columns = columns or self.columns
+        idx = [self.columns.index(c) for c in columns]
+        count, mean, m2, lo, hi = [m[idx] for m in self.moments(start, end)[:5]]
+        empty = count == 0
+        stats = {
+            'count': count,
+            'mean': np.where(empty, np.nan, mean),
+            'std': np.sqrt(np.divide(m2, count - 1, out=np.full_like(m2, np.nan), where=count > 1)),
+            'min': np.where(empty, np.nan, lo),
+        }
+        if quartiles:
+            start, end = self._range(start, end)
+            q = np.full((3, len(idx)), np.nan)
+            with self._lock:
+                window = self._values[start:end][:, idx]
+                if not empty.all():
+                    with np.errstate(all='ignore'), warnings.catch_warnings():
+                        warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN columns give NaN, as in pandas
+                        q = np.nanpercentile(window, [25, 50, 75], axis=0)
+            stats.update({'25%': q[0], '50%': q[1], '75%': q[2]})
+        stats['max'] = np.where(empty, np.nan, hi)
+        return pd.DataFrame(stats, index=columns).T
+
+    def corr(self, start=0, end=None, columns=None):
+        """Pearson correlation matrix of rows [start, end), from the combined co-moments"""
+        columns = columns or self.columns
+        idx = [self.columns.index(c) for c in columns]
+        rows, comoment = self.moments(start, end)[5::2]
+        cov = comoment[np.ix_(idx, idx)]
+        scale = np.sqrt(np.diag(cov))
+        with np.errstate(all='ignore'):
+            corr = cov / np.outer(scale, scale)
+        if rows < 2:
+            corr[:] = np.nan
+        return pd.DataFrame(corr, index=columns, columns=columns)
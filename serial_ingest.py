@@ -0,0 +1,228 @@
+import csv
+import queue
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Parser profiles for the boards we log from.
+# Each line's values are taken from its last len(columns) comma-separated fields,
+# so leading fields like millis() or the fake _id/_rev from the gyro sketch are skipped.
+PROFILES = {
+    'dht22': {'columns': ['Temperature', 'Humidity'], 'dtype': np.float64},
+    'gyro': {'columns': ['x', 'y', 'z'], 'dtype': np.float64},
+    'accel': {'columns': ['X', 'Y', 'Z'], 'dtype': np.int64},
+}
+
+
+class Batch:
+    """A block of samples read in one go from the serial port"""
+
+    def __init__(self, timestamps, values, columns):
+        self.timestamps = timestamps  # int64 epoch nanoseconds, one per row
+        self.values = values  # (rows, len(columns)) array
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def rows(self, timestamp_format=None):
+        # Yield plain lists, with the timestamp formatted for CSV output
+        for ts, values in zip(self.timestamps, self.values.tolist()):
+            if timestamp_format:
+                ts = datetime.fromtimestamp(ts / 1e9).strftime(timestamp_format)
+            yield [ts] + values
+
+
+def parse_lines(lines, n_cols, dtype=np.float64):
+    """Parse raw byte lines into an (n, n_cols) array, returning it with the number of garbled lines"""
+    fields = [line.rsplit(b',', n_cols)[-n_cols:] for line in lines if line.strip()]
+    good = [f for f in fields if len(f) == n_cols]
+    garbled = len(fields) - len(good)
+    if not good:
+        return np.empty((0, n_cols), dtype=dtype), garbled
+
+    try:
+        # Fast path: convert the whole batch in one numpy call
+        return np.array(good).astype(dtype), garbled
+    except ValueError:
+        pass
+
+    # Slow path: something in the batch isn't numeric, so find it line by line
+    parsed = []
+    for f in good:
+        try:
+            parsed.append(np.array(f).astype(dtype))
+        except ValueError:
+            garbled += 1
+    if not parsed:
+        return np.empty((0, n_cols), dtype=dtype), garbled
+    return np.vstack(parsed), garbled
+
+
+def spread_timestamps(previous, received, n):
+    """n int64 timestamps evenly spaced after previous, the last one at received
+
+    A read returns every line that arrived since the last read, so the
+    samples are spread across that interval instead of all getting the
+    receive time of the read.
+    """
+    if previous is None or previous >= received:
+        return np.full(n, received, dtype=np.int64)
+    return np.linspace(previous, received, n + 1)[1:].astype(np.int64)
+
+
+class SerialIngest:
+    """Reads a serial port on a background thread and hands parsed batches to sinks"""
+
+    def __init__(self, ser, columns, sinks, dtype=np.float64, chunk_size=65536, queue_size=64):
+        self.ser = ser  # An already-open serial.Serial (or anything with read() and in_waiting)
+        self.columns = list(columns)
+        self.sinks = list(sinks)
+        self.dtype = dtype
+        self.chunk_size = chunk_size
+        self.queue = queue.Queue(maxsize=queue_size)  # Bounded so a slow sink can't eat all our memory
+
+        # Counters, only ever incremented by the reader thread
+        self.lines = 0
+        self.samples = 0
+        self.garbled = 0
+        self.dropped = 0
+        self.batches = 0
+
+        self._stop = threading.Event()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+
+    def start(self):
+        self._writer.start()
+        self._reader.start()
+        return self
+
+    def stop(self):
+        # Stop reading, let the writer drain whatever is queued, then close the sinks
+        self._stop.set()
+        self._reader.join()
+        self._writer.join()
+        for sink in self.sinks:
+            if hasattr(sink, 'close'):
+                sink.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        return {
+            'lines': self.lines,
+            'samples': self.samples,
+            'garbled': self.garbled,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'queued': self.queue.qsize(),
+        }
+
+    def _read_chunk(self):
+        # Block for the first byte (up to the port timeout), then grab everything else already waiting
+        data = self.ser.read(1)
+        if data:
+            waiting = min(self.ser.in_waiting, self.chunk_size)
+            if waiting:
+                data += self.ser.read(waiting)
+        return data
+
+    def _read_loop(self):
+        pending = b''
+        previous = None  # When the port was last read (or found empty)
+        while not self._stop.is_set():
+            data = self._read_chunk()
+            received = time.time_ns()
+            if not data:
+                previous = received
+                continue
+
+            # Keep the partial last line around until the rest of it arrives
+            lines = (pending + data).split(b'\n')
+            pending = lines.pop()
+            if not lines:
+                continue
+
+            values, garbled = parse_lines(lines, len(self.columns), self.dtype)
+            self.lines += len(lines)
+            self.garbled += garbled
+            previous, start = received, previous
+            if not len(values):
+                continue
+
+            timestamps = spread_timestamps(start, received, len(values))
+            batch = Batch(timestamps, values, self.columns)
+            try:
+                self.queue.put_nowait(batch)
+                self.samples += len(batch)
+                self.batches += 1
+            except queue.Full:
+                self.dropped += len(batch)
+
+    def _write_loop(self):
+        while not (self._stop.is_set() and self.queue.empty() and not self._reader.is_alive()):
+            try:
+                batch = self.queue.get(timeout=0.2)
+            except queue.Empty:
+                self._tick()
+                continue
+            for sink in self.sinks:
+                try:
+                    sink.write(batch)
+                except Exception as e:
+                    print(f"Sink {type(sink).__name__} failed: {e}")
+            self._tick()
+
+    def _tick(self):
+        # At least every 0.2 s, so sinks with a time-based flush keep to it when the port goes quiet
+        for sink in self.sinks:
+            if hasattr(sink, 'tick'):
+                try:
+                    sink.tick()
+                except Exception as e:
+                    print(f"Sink {type(sink).__name__} failed: {e}")
+
+
+class CSVBatchWriter:
+    """Sink that appends each batch to an open csv.writer in one writerows call
+
+    The file is flushed by tick() once rows have waited flush_interval
+    seconds, so a dashboard tailing the CSV sees them without waiting for
+    the file buffer to fill.
+    """
+
+    def __init__(self, file, timestamp_format='%Y-%m-%d %H:%M:%S.%f', flush_interval=1.0):
+        self.file = file
+        self.writer = csv.writer(file)
+        self.timestamp_format = timestamp_format
+        self.flush_interval = flush_interval
+        self._unflushed = False
+        self._last_flush = time.time()
+
+    def write(self, batch):
+        if self.timestamp_format is None:
+            self.writer.writerows(batch.values.tolist())
+        else:
+            self.writer.writerows(batch.rows(self.timestamp_format))
+        self._unflushed = True
+
+    def tick(self):
+        # Flush rows that have waited flush_interval (SerialIngest calls this after every batch and when idle)
+        if self._unflushed and time.time() - self._last_flush >= self.flush_interval:
+            self.file.flush()
+            self._unflushed = False
+            self._last_flush = time.time()
+
+
+class ConsoleSink:
+    """Sink that prints one summary line per batch instead of one line per sample"""
+
+    def write(self, batch):
+        print(f"{len(batch)} samples, latest: {dict(zip(batch.columns, batch.values[-1].tolist()))}")
@@ -1,7 +1,7 @@
 import serial
 import time
 import csv
-from datetime import datetime
+from serial_ingest import SerialIngest, CSVBatchWriter, ConsoleSink, PROFILES
 
 arduino = serial.Serial('COM7', 9600, timeout=1)
 
@@ -10,23 +10,20 @@ with open('accelerometer_data.csv', mode='a', newline='') as file:
     writer = csv.writer(file)
     writer.writerow(['Timestamp', 'X', 'Y', 'Z'])  # CSV headers
 
-    # Collect data for a specified duration
-    start_time = time.time()
-    while True:
-        try:
-            # Read data from Arduino (accelerometer readings)
-            line = arduino.readline().decode('utf-8').strip()
-            if line:
-                # Get the current timestamp in YYYYMMDDHHMMSS format
-                timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                # Split the data into X, Y, Z values
-                data = line.split(',')
-                # Write the timestamp and data to the CSV file
-                writer.writerow([timestamp] + data)
-                print(f"{timestamp}: {data}")  # Print to console
-            time.sleep(1)  # Adjust sleep time for your sampling frequency
-        except KeyboardInterrupt:
-            break
+    # Read the port on a background thread and write samples in batches
+    # Timestamps stay in YYYYMMDDHHMMSS format
+    ingest = SerialIngest(arduino, PROFILES['accel']['columns'],
+                          [CSVBatchWriter(file, timestamp_format='%Y%m%d%H%M%S'), ConsoleSink()],
+                          dtype=PROFILES['accel']['dtype'])
+    ingest.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ingest.stop()
+        print(f"Stats: {ingest.stats()}")
 
 # Close the serial connection when done
 arduino.close()
@@ -1,24 +1,42 @@
+import os
+import sys
 import serial
-import json
 import firebase_admin
 from firebase_admin import credentials, db
 import time
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))  # Shared helpers live in the repo root
+from serial_ingest import SerialIngest, PROFILES
+from db_sinks import FirebaseBatchWriter, FakeFirebaseRef
+
+USE_FAKE_FIREBASE = False  # True to upload into an in-memory stand-in (no network), e.g. to test batching
+FLUSH_WINDOW = 1.0  # Seconds samples may wait before being uploaded
+BATCH_SIZE = 500  # Upload early once this many samples are waiting
+
 # Initialize Firebase
-cred = credentials.Certificate("arduino-59447-firebase-adminsdk-fbsvc-a7fea71160.json")  # Add your Firebase credentials
-firebase_admin.initialize_app(cred, {"databaseURL": "https://arduino-59447-default-rtdb.firebaseio.com/"})
+if USE_FAKE_FIREBASE:
+    ref = FakeFirebaseRef(latency=0.2)
+else:
+    cred = credentials.Certificate("arduino-59447-firebase-adminsdk-fbsvc-a7fea71160.json")  # Add your Firebase credentials
+    firebase_admin.initialize_app(cred, {"databaseURL": "https://arduino-59447-default-rtdb.firebaseio.com/"})
+    ref = db.reference("gyroscope_data")
 
 # Open Serial Connection
-ser = serial.Serial("COM7", 115200)  # Replace COMx with your Arduino port
-ref = db.reference("gyroscope_data")
+ser = serial.Serial("COM7", 115200, timeout=1)  # Replace COMx with your Arduino port
+
+# Samples are read on one thread and uploaded in multi-path update() batches on another,
+# so the serial port is never left waiting on an HTTPS round trip
+uploader = FirebaseBatchWriter(ref, batch_size=BATCH_SIZE, linger=FLUSH_WINDOW)
+ingest = SerialIngest(ser, PROFILES['gyro']['columns'], [uploader])
+ingest.start()
 
-while True:
-    try:
-        line = ser.readline().decode().strip()
-        x, y, z = map(float, line.split(","))
-        timestamp = time.time()
-        data = {"timestamp": timestamp, "x": x, "y": y, "z": z}
-        ref.push(data)
-        print("Uploaded:", data)
-    except Exception as e:
-        print("Error:", e)
+try:
+    while True:
+        time.sleep(5)
+        print("Serial:", ingest.stats(), "Upload:", uploader.metrics())
+except KeyboardInterrupt:
+    print("Stopping...")
+finally:
+    ingest.stop()  # Also flushes and stops the uploader
+    print("Serial:", ingest.stats(), "Upload:", uploader.metrics())
+    ser.close()
@@ -1,10 +1,37 @@
 import dash
 from dash import dcc, html, Input, Output
 import plotly.express as px
+import plotly.graph_objects as go
 import pandas as pd
+import os
+import sys
 
-# Load gyroscope data from CSV
-df = pd.read_csv('gyroscope_data.csv')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))  # Shared helpers live in the repo root
+from column_store import ColumnStore, has_store
+from decimate import decimate
+from running_stats import ChunkedStats
+from pyramid import Pyramid, has_pyramid
+
+STORE_DIR = 'gyro_store'  # Written by the serial collector alongside the CSV
+HISTORY_SECONDS = None  # e.g. 3600 to only load the last hour from the store
+PYRAMID_DIR = os.path.join(STORE_DIR, 'pyramid')  # Min/max/mean summaries written by the collector
+DEFAULT_WIDTH = 1200  # Plot width in pixels until the browser reports its own
+
+# Load gyroscope data, from the column store if there is one, otherwise from CSV
+if has_store(STORE_DIR):
+    df = ColumnStore(STORE_DIR).read_recent_frame(HISTORY_SECONDS)
+    print(f"Loaded {len(df)} samples from the column store in {STORE_DIR}")
+else:
+    df = pd.read_csv('gyroscope_data.csv')
+    print(f"Loaded {len(df)} samples from gyroscope_data.csv")
+
+# Per-chunk moments, so page summaries and correlations don't rescan the rows
+stats = ChunkedStats(['x', 'y', 'z'])
+stats.extend(df)
+
+# Zoomable view of the whole recording, served from the pyramid level that matches the plot width
+pyramid = Pyramid(PYRAMID_DIR) if has_pyramid(PYRAMID_DIR) else None
+raw_store = ColumnStore(STORE_DIR) if has_store(STORE_DIR) else None
 
 # Initialize Dash app
 app = dash.Dash(__name__)
@@ -42,6 +69,17 @@ app.layout = html.Div([
     
     # Text box for sample selection
     dcc.Input(id='sample-size', type='number', value=100),
+
+    # Downsampling for the scatter, line and bar charts
+    dcc.Dropdown(
+        id='decimation',
+        options=[
+            {'label': 'Downsample: LTTB (keeps shape and peaks)', 'value': 'lttb'},
+            {'label': 'Downsample: Min/Max per bucket (fastest)', 'value': 'minmax'},
+            {'label': 'Downsample: Off (send every point)', 'value': 'off'}
+        ],
+        value='lttb'
+    ),
     
     # Navigation buttons
     html.Button('Previous', id='prev-button', n_clicks=0),
@@ -49,22 +87,54 @@ app.layout = html.Div([
     
     # Graph
     dcc.Graph(id='gyroscope-graph'),
+    html.Div(id='decimation-info'),
+
+    # Browser window width, read once on page load, caps the points per trace
+    dcc.Store(id='screen-width', data=DEFAULT_WIDTH),
+    dcc.Interval(id='width-probe', interval=500, max_intervals=1),
     
     # Summary table
     html.Div(id='summary-table')
 ])
 
+if pyramid is not None:
+    app.layout.children += [
+        html.H2("Full History"),
+        dcc.Graph(id='overview-graph'),
+        html.Div(id='overview-info')
+    ]
+
+# Report the browser's width so the server knows how many points are worth sending
+app.clientside_callback(
+    "function(n) { return window.innerWidth || null; }",
+    Output('screen-width', 'data'),
+    Input('width-probe', 'n_intervals')
+)
+
+# Downsample each column to about one point per pixel and return it in long format for plotly express
+def decimated_long(sliced_df, columns, max_points, method):
+    parts = []
+    for col in columns:
+        keep = decimate(sliced_df[col].to_numpy(), max_points, method)
+        part = sliced_df[col].iloc[keep]
+        parts.append(pd.DataFrame({'index': part.index, 'variable': col, 'value': part.to_numpy()}))
+    long_df = pd.concat(parts, ignore_index=True)
+    return long_df, max((len(p) for p in parts), default=0)
+
 # Callback to update graph and summary table
 @app.callback(
     [Output('gyroscope-graph', 'figure'),
-     Output('summary-table', 'children')],
+     Output('summary-table', 'children'),
+     Output('decimation-info', 'children')],
     [Input('graph-type', 'value'),
      Input('variable-select', 'value'),
      Input('sample-size', 'value'),
      Input('prev-button', 'n_clicks'),
-     Input('next-button', 'n_clicks')]
+     Input('next-button', 'n_clicks'),
+     Input('decimation', 'value'),
+     Input('screen-width', 'data')]
 )
-def update_graph(graph_type, variable, sample_size, prev_clicks, next_clicks):
+def update_graph(graph_type, variable, sample_size, prev_clicks, next_clicks, method, screen_width):
     # Calculate start and end index for data slicing
     total_samples = len(df)
     start_idx = (prev_clicks - next_clicks) * sample_size
@@ -83,26 +153,34 @@ def update_graph(graph_type, variable, sample_size, prev_clicks, next_clicks):
     else:
         columns = [variable]
     
+    # Time-series charts are downsampled to about one point per pixel of width
+    max_points = int(screen_width or DEFAULT_WIDTH)
+    info = ""
+    if graph_type in ('scatter', 'line', 'bar'):
+        plot_df, shown = decimated_long(sliced_df, columns, max_points, method)
+        if len(sliced_df):
+            info = f"Showing {shown:,} of {len(sliced_df):,} points per trace ({len(sliced_df) / max(shown, 1):.1f}:1, {method})"
+
     # Create graph based on selected type
     if graph_type == 'scatter':
-        fig = px.scatter(sliced_df, x=sliced_df.index, y=columns, title='Scatter Plot of Gyroscope Data')
+        fig = px.scatter(plot_df, x='index', y='value', color='variable', title='Scatter Plot of Gyroscope Data')
     elif graph_type == 'line':
-        fig = px.line(sliced_df, x=sliced_df.index, y=columns, title='Line Chart of Gyroscope Data')
+        fig = px.line(plot_df, x='index', y='value', color='variable', title='Line Chart of Gyroscope Data')
     elif graph_type == 'histogram':
         fig = px.histogram(sliced_df, x=columns, title='Distribution Plot of Gyroscope Data')
     elif graph_type == 'bar':
-        fig = px.bar(sliced_df, x=sliced_df.index, y=columns, title='Bar Chart of Gyroscope Data')
+        fig = px.bar(plot_df, x='index', y='value', color='variable', title='Bar Chart of Gyroscope Data')
     elif graph_type == 'box':
         fig = px.box(sliced_df, y=columns, title='Box Plot of Gyroscope Data')
     elif graph_type == 'violin':
         fig = px.violin(sliced_df, y=columns, title='Violin Plot of Gyroscope Data')
     elif graph_type == 'heatmap':
         # Heatmap requires a pivot table or correlation matrix
-        corr_matrix = sliced_df[columns].corr()
+        corr_matrix = stats.corr(start_idx, end_idx, columns)
         fig = px.imshow(corr_matrix, text_auto=True, title='Heatmap of Gyroscope Data')
     
     # Create summary table
-    summary = sliced_df[columns].describe().reset_index()
+    summary = stats.describe(start_idx, end_idx, columns).reset_index()
     table = html.Table([
         html.Thead(html.Tr([html.Th(col) for col in summary.columns])),
         html.Tbody([
@@ -111,7 +189,46 @@ def update_graph(graph_type, variable, sample_size, prev_clicks, next_clicks):
         ])
     ])
     
-    return fig, table
+    return fig, table, info
+
+# Time range the user has zoomed to on the overview graph, as epoch ns (None = everything)
+def zoom_range(relayout):
+    relayout = relayout or {}
+    if 'xaxis.range[0]' in relayout:
+        bounds = relayout['xaxis.range[0]'], relayout['xaxis.range[1]']
+    elif 'xaxis.range' in relayout:
+        bounds = relayout['xaxis.range']
+    else:
+        return None, None
+    return pd.Timestamp(bounds[0]).value, pd.Timestamp(bounds[1]).value
+
+# Redraw the overview at the resolution of the zoomed range: about one pyramid bucket per pixel,
+# drawn as a min/max band around the mean, down to raw samples when zoomed in far enough
+if pyramid is not None:
+    @app.callback(
+        [Output('overview-graph', 'figure'),
+         Output('overview-info', 'children')],
+        [Input('overview-graph', 'relayoutData'),
+         Input('screen-width', 'data')]
+    )
+    def update_overview(relayout, screen_width):
+        pyramid.reload()
+        raw_store.reload()
+        start, end = zoom_range(relayout)
+        level, zoom_df = pyramid.read_for_width(start, end, int(screen_width or DEFAULT_WIDTH), raw_store)
+
+        fig = go.Figure()
+        for col, color in zip(pyramid.columns, px.colors.qualitative.Plotly):
+            fig.add_trace(go.Scatter(x=zoom_df['timestamp'], y=zoom_df[f'{col}_max'], mode='lines',
+                                     line=dict(width=0, color=color), showlegend=False, hoverinfo='skip'))
+            fig.add_trace(go.Scatter(x=zoom_df['timestamp'], y=zoom_df[f'{col}_min'], mode='lines',
+                                     line=dict(width=0, color=color), fill='tonexty', showlegend=False, hoverinfo='skip'))
+            fig.add_trace(go.Scatter(x=zoom_df['timestamp'], y=zoom_df[f'{col}_mean'], mode='lines',
+                                     line=dict(color=color), name=col))
+        fig.update_layout(title='Gyroscope Data - Full History (drag to zoom)', uirevision='overview')
+
+        info = f"{len(zoom_df):,} points, {2 ** level} samples each" if level else f"{len(zoom_df):,} raw samples"
+        return fig, info
 
 # Run the app
 if __name__ == '__main__':
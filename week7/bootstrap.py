@@ -0,0 +1,130 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Bootstrap confidence intervals for the original vs outlier-filtered model.
+#
+# Every replicate resamples the readings with replacement, fits Humidity ~
+# Temperature on the whole resample and on the part of it that survives the
+# outlier filter, and records slope, intercept and R² of both. The spread of
+# those fits over thousands of replicates gives the confidence intervals, and
+# the spread of (filtered - original) within each replicate says whether the
+# filter really changes the model or the change is within sampling noise.
+#
+# Replicates run on a process pool. The readings are copied once into a shared
+# memory block that every worker maps, so a task is just (seed, count) and
+# only the small result arrays travel back through pickling.
+STATS = ['slope', 'intercept', 'r2']
+REPLICATES = 2000
+BATCH = 50  # Replicates per pool task
+
+_shared = {}  # Per worker: the mapped shared memory and the (2, n) array of x and y in it
+
+
+def fit(x, y):
+    """(slope, intercept, r2) of the least-squares line through x, y"""
+    if len(x) < 2:
+        return np.nan, np.nan, np.nan
+    mx, my = x.mean(), y.mean()
+    dx, dy = x - mx, y - my
+    sxx, sxy, syy = dx @ dx, dx @ dy, dy @ dy
+    with np.errstate(all='ignore'):
+        slope = sxy / sxx
+        return slope, my - slope * mx, sxy * sxy / (sxx * syy)
+
+
+def _attach(name, n):
+    # Pool workers share the parent's resource tracker, so the block is still unlinked only once, by the parent
+    shm = shared_memory.SharedMemory(name=name)
+    _shared['shm'] = shm
+    _shared['xy'] = np.ndarray((2, n), dtype=np.float64, buffer=shm.buf)
+
+
+def _replicates(seed, count, trim, bounds):
+    """count bootstrap fits as a (count, 2, 3) array: [original, filtered] x STATS"""
+    x, y = _shared['xy']
+    rng = np.random.default_rng(seed)
+    out = np.empty((count, 2, len(STATS)))
+    for i in range(count):
+        idx = rng.integers(0, len(x), len(x))
+        xb, yb = x[idx], y[idx]
+        # With a trim the bounds are re-estimated on every resample, so their own uncertainty is included
+        lower, upper = bounds if trim is None else np.quantile(xb, [trim, 1 - trim])
+        keep = (xb >= lower) & (xb <= upper)
+        out[i, 0] = fit(xb, yb)
+        out[i, 1] = fit(xb[keep], yb[keep])
+    return out
+
+
+def bootstrap_fits(x, y, trim=None, bounds=None, replicates=REPLICATES, workers=None, seed=0):
+    """(replicates, 2, 3) array of bootstrap fits of the original and filtered data
+
+    The filter keeps trim..1-trim quantiles of each resample, or the fixed
+    (lower, upper) bounds. Results depend only on seed, not on the number of
+    workers (every batch has its own seed).
+    """
+    if (trim is None) == (bounds is None):
+        raise ValueError("Give either trim or bounds")
+    xy = np.vstack([np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)])
+    sizes = [min(BATCH, replicates - start) for start in range(0, replicates, BATCH)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        _shared['xy'] = xy
+        return np.concatenate([_replicates(s, k, trim, bounds) for s, k in zip(seeds, sizes)])
+
+    shm = shared_memory.SharedMemory(create=True, size=xy.nbytes)
+    try:
+        np.ndarray(xy.shape, dtype=np.float64, buffer=shm.buf)[:] = xy
+        with ProcessPoolExecutor(min(workers, len(sizes)), initializer=_attach,
+                                 initargs=(shm.name, xy.shape[1])) as pool:
+            parts = pool.map(_replicates, seeds, sizes, [trim] * len(sizes), [bounds] * len(sizes))
+            return np.concatenate(list(parts))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def bootstrap_compare(df, trim=None, bounds=None, replicates=REPLICATES, confidence=0.95, workers=None, seed=0):
+    """Confidence intervals for the original model, the filtered model and their difference
+
+    Returns one row per (model, stat) with the point estimate and percentile
+    interval; the 'change' rows (filtered - original) also have a two-sided
+    bootstrap p-value and whether the interval excludes zero.
+    """
+    df = df[['Temperature', 'Humidity']].dropna()
+    x, y = df['Temperature'].to_numpy(dtype=np.float64), df['Humidity'].to_numpy(dtype=np.float64)
+    lower, upper = bounds if trim is None else np.quantile(x, [trim, 1 - trim])
+    keep = (x >= lower) & (x <= upper)
+    estimate = np.array([fit(x, y), fit(x[keep], y[keep])])
+    estimate = np.vstack([estimate, estimate[1] - estimate[0]])
+
+    fits = bootstrap_fits(x, y, trim, bounds, replicates, workers, seed)
+    samples = np.concatenate([fits, fits[:, 1:] - fits[:, :1]], axis=1)  # [original, filtered, change]
+    alpha = (1 - confidence) / 2
+    low, high = np.nanquantile(samples, [alpha, 1 - alpha], axis=0)
+
+    rows = []
+    for m, model in enumerate(['original', 'filtered', 'change']):
+        for s, stat in enumerate(STATS):
+            row = {'model': model, 'stat': stat, 'estimate': estimate[m, s], 'lower': low[m, s], 'upper': high[m, s]}
+            if model == 'change':
+                d = samples[:, m, s]
+                tail = min((d <= 0).sum(), (d >= 0).sum())
+                row['p_value'] = min(1.0, 2 * (tail + 1) / (len(d) + 1))
+                row['significant'] = not low[m, s] <= 0 <= high[m, s]
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def print_bootstrap(result, confidence=0.95):
+    print(f"Bootstrap {confidence:.0%} confidence intervals:")
+    for row in result.itertuples():
+        line = f"  {row.model:>8} {row.stat:<9} {row.estimate:9.4f}  [{row.lower:9.4f}, {row.upper:9.4f}]"
+        if row.model == 'change':
+            line += f"  p = {row.p_value:.4f}" + ("  significant" if row.significant else "")
+        print(line)
@@ -0,0 +1,131 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))  # Shared helpers live in the repo root
+from column_store import ColumnStore, has_store
+from online_regression import OnlineLinearRegression
+from quantile_sketch import QuantileSketch
+
+CSV_FILE = 'dht22_data.csv'
+STORE_DIR = 'dht22_store'  # Written by task7.1.py alongside the CSV
+MODEL_FILE = 'dht22_model.json'  # Online regression kept up to date by task7.1.py
+QUANTILES_FILE = 'dht22_quantiles.json'  # Temperature quantile sketch kept up to date by task7.1.py
+
+
+def clean_columns(df):
+    """Strip units from column names, e.g. 'Temperature (°C)' -> 'Temperature'"""
+    df.columns = df.columns.str.replace(r' \(.*\)', '', regex=True).str.strip()
+    return df
+
+
+def load_dht22(filename=CSV_FILE, start=None, end=None):
+    """Load DHT22 readings, optionally only those between start and end (anything pd.Timestamp accepts)
+
+    Reads from the column store when task7.1.py has written one, so a time range
+    only touches the chunks it overlaps; otherwise falls back to the CSV. Like
+    the CSV, the store only holds the latest collection run (task7.1.py moves
+    older stores aside), and it is updated every few seconds while collecting.
+    Prints which source was used.
+    """
+    start = None if start is None else pd.Timestamp(start).as_unit('ns').value
+    end = None if end is None else pd.Timestamp(end).as_unit('ns').value
+
+    if filename == CSV_FILE and has_store(STORE_DIR):
+        df = ColumnStore(STORE_DIR).read_frame(start, end)
+        print(f"Loaded {len(df)} readings from the column store {STORE_DIR}")
+        return df
+
+    df = clean_columns(pd.read_csv(filename))
+    print(f"Loaded {len(df)} readings from {filename}")
+    if (start is not None or end is not None) and 'Timestamp' not in df.columns:
+        raise ValueError(f"{filename} has no Timestamp column, so it can't be filtered by start/end")
+    if start is not None or end is not None:
+        ts = pd.to_datetime(df['Timestamp'])
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= ts >= pd.Timestamp(start, unit='ns')
+        if end is not None:
+            mask &= ts <= pd.Timestamp(end, unit='ns')
+        df = df[mask]
+    return df
+
+
+def load_live_model(df, path=MODEL_FILE):
+    """The Humidity ~ Temperature model task7.1.py updates as readings arrive, if it is the fit of df
+
+    The model is only returned when it is the plain least-squares fit (no
+    forgetting) of exactly the readings in df: same count, means and
+    temperature range. Otherwise (another run, a time range, collection
+    ahead of the file) the reason is printed and None returned, so the
+    caller fits df itself.
+    """
+    if not os.path.exists(path):
+        return None
+    model = OnlineLinearRegression.load(path)
+    pairs = df[['Temperature', 'Humidity']].dropna()
+    if model.forgetting < 1.0:
+        reason = f"it down-weights older readings (forgetting={model.forgetting})"
+    elif model.n != len(pairs) or model.n < 2:
+        reason = f"it has {model.n} readings and the data has {len(pairs)}"
+    elif not np.allclose([model.mean_x, model.mean_y, model.min_x, model.max_x],
+                         [pairs['Temperature'].mean(), pairs['Humidity'].mean(),
+                          pairs['Temperature'].min(), pairs['Temperature'].max()], rtol=1e-6, atol=1e-4):
+        reason = "its readings are not the ones in the data"  # The store keeps float32, hence the tolerance
+    else:
+        return model
+    print(f"Not using {path}: {reason}")
+    return None
+
+
+
+def iter_dht22(filename=CSV_FILE, chunksize=100_000):
+    """The readings as a sequence of DataFrames (store chunks, or chunksize rows of the CSV at a time)"""
+    if filename == CSV_FILE and has_store(STORE_DIR):
+        yield from ColumnStore(STORE_DIR).iter_frames()
+    else:
+        for chunk in pd.read_csv(filename, chunksize=chunksize):
+            yield clean_columns(chunk)
+
+
+def temperature_sketch(filename=CSV_FILE, path=QUANTILES_FILE):
+    """Quantile sketch of every temperature in the data, built without loading it all at once
+
+    task7.1.py's saved sketch is used when it belongs to the current store
+    (same store run and number of readings); otherwise the store or CSV is
+    sketched one chunk at a time.
+    """
+    if filename == CSV_FILE and has_store(STORE_DIR) and os.path.exists(path):
+        store = ColumnStore(STORE_DIR)
+        sketch = QuantileSketch.load(path)
+        if sketch.source is not None and sketch.source == store.index.get('created') and sketch.n == len(store):
+            print(f"Using the quantile sketch in {path}")
+            return sketch
+        print(f"Not using {path}: it doesn't cover exactly the readings in {STORE_DIR}")
+    sketch = QuantileSketch('Temperature')
+    for chunk in iter_dht22(filename):
+        sketch.update(chunk['Temperature'].to_numpy(dtype=np.float64))
+    return sketch
+
+
+def filter_dht22(lower, upper, out_path, filename=CSV_FILE):
+    """Write the readings with lower <= Temperature <= upper to out_path, one chunk at a time
+
+    Returns (kept, total, lowest kept temperature, highest kept temperature).
+    """
+    kept = total = 0
+    lowest, highest = np.inf, -np.inf
+    for i, chunk in enumerate(iter_dht22(filename)):
+        temps = chunk['Temperature']
+        # Compare in the column's own dtype, so e.g. 19.3 read back from the float32 store isn't below a 19.3 bound
+        lo, hi = np.asarray([lower, upper]).astype(temps.dtype)
+        part = chunk[(temps >= lo) & (temps <= hi)]
+        part.to_csv(out_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        kept += len(part)
+        total += len(chunk)
+        if len(part):
+            lowest = min(lowest, part['Temperature'].min())
+            highest = max(highest, part['Temperature'].max())
+    return kept, total, lowest, highest
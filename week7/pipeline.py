@@ -0,0 +1,324 @@
+import argparse
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from bootstrap import bootstrap_compare, print_bootstrap, REPLICATES
+from dht22_source import load_dht22, CSV_FILE, STORE_DIR, has_store
+
+# One entry point for the week 7 analysis (steps 3 to 9).
+#
+# The data is parsed once per run and every intermediate result (cleaned frame,
+# quantile bounds, fitted models, predictions, figures) is cached on disk under
+# a key made from a hash of the input, so re-running one stage or one figure
+# only recomputes what isn't cached yet, and new data invalidates everything.
+# Only the latest input's entries are kept: writing an entry deletes those of
+# any other key, so a store that is still recording doesn't fill the cache.
+#
+#   python pipeline.py fit                      # Step 3: model on all data
+#   python pipeline.py predict                  # Step 4: predictions.csv
+#   python pipeline.py filter --trim 0.05       # Step 6: filtered_data.csv
+#   python pipeline.py compare --trim 0.05      # Step 9: original vs filtered model
+#   python pipeline.py bootstrap --trim 0.05    # Step 9 with confidence intervals (all CPU cores)
+#   python pipeline.py plot --figure trend      # Step 5 (also: filtered, compare, sweep)
+#   python pipeline.py sweep                    # Fit every trim from 0% to 25% to choose one
+#   python pipeline.py all                      # Everything above
+CACHE_DIR = '.pipeline_cache'
+STAGES = ['fit', 'predict', 'filter', 'compare', 'bootstrap', 'sweep', 'plot']
+FIGURES = ['trend', 'filtered', 'compare', 'sweep']
+SWEEP_MAX = 0.25  # Largest trim (each end) in the sweep
+SWEEP_STEP = 0.0025
+
+
+def input_hash(filename=CSV_FILE):
+    """Hash of the data the pipeline will read: the store's index, or the CSV's bytes"""
+    h = hashlib.sha1()
+    if filename == CSV_FILE and has_store(STORE_DIR):
+        path = os.path.join(STORE_DIR, 'index.json')  # Lists every chunk with its rows and time range
+    else:
+        path = filename
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+
+def fit_line(df):
+    """Least-squares Humidity ~ Temperature fit, with the statistics the step scripts print"""
+    df = df[['Temperature', 'Humidity']].dropna()
+    x, y = df['Temperature'].to_numpy(), df['Humidity'].to_numpy()
+    slope, intercept = np.polyfit(x, y, 1)
+    residuals = y - (slope * x + intercept)
+    ss_tot = ((y - y.mean()) ** 2).sum()
+    return {
+        'n': len(df),
+        'slope': float(slope),
+        'intercept': float(intercept),
+        'r2': float(1 - (residuals ** 2).sum() / ss_tot) if ss_tot > 0 else float('nan'),
+        'std_error': float(np.sqrt(np.mean(residuals ** 2))),
+        'min_temperature': float(x.min()),
+        'max_temperature': float(x.max()),
+    }
+
+
+def trim_sweep(df, trims):
+    """fit_line() for every trim level at once, as a DataFrame with one row per trim
+
+    The rows are sorted by temperature once. Every trim keeps a contiguous
+    slice of the sorted rows, so the sums a least-squares line needs (n, x, y,
+    x², xy, y²) come from prefix sums in O(1) per trim. Values are centred
+    first to keep the sums well conditioned.
+    """
+    df = df[['Temperature', 'Humidity']].dropna()
+    order = np.argsort(df['Temperature'].to_numpy(), kind='stable')
+    x = df['Temperature'].to_numpy(dtype=np.float64)[order]
+    y = df['Humidity'].to_numpy(dtype=np.float64)[order]
+    trims = np.asarray(trims, dtype=np.float64)
+
+    # Same bounds and inclusive filter as the step scripts: quantile(t) <= x <= quantile(1 - t)
+    lower = np.quantile(x, trims)
+    upper = np.quantile(x, 1 - trims)
+    lo = np.searchsorted(x, lower, side='left')
+    hi = np.searchsorted(x, upper, side='right')
+
+    x0, y0 = x.mean(), y.mean()
+    xc, yc = x - x0, y - y0
+    prefix = lambda v: np.concatenate([[0.0], np.cumsum(v)])
+    window = lambda p: p[hi] - p[lo]
+    n = (hi - lo).astype(np.float64)
+    sx, sy = window(prefix(xc)), window(prefix(yc))
+    sxx, sxy, syy = window(prefix(xc * xc)), window(prefix(xc * yc)), window(prefix(yc * yc))
+
+    with np.errstate(all='ignore'):
+        cxx = sxx - sx * sx / n
+        cxy = sxy - sx * sy / n
+        cyy = syy - sy * sy / n
+        slope = cxy / cxx
+        intercept = (sy / n + y0) - slope * (sx / n + x0)
+        r2 = cxy * cxy / (cxx * cyy)
+        rmse = np.sqrt(np.maximum(cyy - slope * cxy, 0) / n)
+    return pd.DataFrame({'trim': trims, 'kept': n.astype(np.int64), 'lower': lower, 'upper': upper,
+                         'slope': slope, 'intercept': intercept, 'r2': r2, 'rmse': rmse})
+
+
+class Pipeline:
+    """Cached stages of the DHT22 analysis; every method returns a cached result when it can"""
+
+    def __init__(self, filename=CSV_FILE, cache_dir=CACHE_DIR, use_cache=True):
+        self.filename = filename
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.key = input_hash(filename)
+        self._memo = {}
+        self._pruned = False
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _name(self, stage, **params):
+        return '-'.join([stage, self.key] + [f"{k}={v}" for k, v in sorted(params.items())])
+
+    def _cached(self, stage, compute, **params):
+        name = self._name(stage, **params)
+        if name in self._memo:
+            return self._memo[name]
+        path = os.path.join(self.cache_dir, name + '.pkl')
+        if self.use_cache and os.path.exists(path):
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+        else:
+            result = compute()
+            self._prune()
+            with open(path, 'wb') as f:
+                pickle.dump(result, f)
+        self._memo[name] = result
+        return result
+
+    def _prune(self):
+        # Entries are named stage-key-params; those of any other key are for data that has since changed
+        if self._pruned:
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(('.pkl', '.done')) and name.split('-')[1:2] != [self.key]:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+        self._pruned = True
+
+    # ---- Stages ----
+
+    def data(self):
+        return self._cached('clean', lambda: load_dht22(self.filename))
+
+    def bounds(self, trim):
+        """Temperature quantiles that cut `trim` off each end"""
+        def compute():
+            t = self.data()['Temperature']
+            return float(t.quantile(trim)), float(t.quantile(1 - trim))
+        return self._cached('bounds', compute, trim=trim)
+
+    def filtered(self, trim):
+        if trim == 0:
+            return self.data()
+
+        def compute():
+            df = self.data()
+            lower, upper = self.bounds(trim)
+            return df[(df['Temperature'] >= lower) & (df['Temperature'] <= upper)]
+        return self._cached('filtered', compute, trim=trim)
+
+    def fit(self, trim=0.0):
+        return self._cached('fit', lambda: fit_line(self.filtered(trim)), trim=trim)
+
+    def predictions(self, trim=0.0, points=100):
+        def compute():
+            model = self.fit(trim)
+            temps = np.linspace(model['min_temperature'], model['max_temperature'], points)
+            return pd.DataFrame({'Test_Temperature': temps,
+                                 'Predicted_Humidity': model['slope'] * temps + model['intercept']})
+        return self._cached('predictions', compute, trim=trim, points=points)
+
+    def compare(self, trim):
+        def compute():
+            original, filtered = self.fit(0.0), self.fit(trim)
+            return {'original': original, 'filtered': filtered,
+                    'slope_change': filtered['slope'] - original['slope'],
+                    'intercept_change': filtered['intercept'] - original['intercept']}
+        return self._cached('compare', compute, trim=trim)
+
+    def bootstrap(self, trim, replicates=REPLICATES, seed=0, workers=None):
+        # workers is not part of the key: the replicates only depend on the seed
+        return self._cached('bootstrap', lambda: bootstrap_compare(self.data(), trim, replicates=replicates,
+                                                                   workers=workers, seed=seed),
+                            trim=trim, replicates=replicates, seed=seed)
+
+    def sweep(self, max_trim=SWEEP_MAX, step=SWEEP_STEP):
+        trims = np.round(np.arange(0, max_trim + step / 2, step), 6)
+        return self._cached('sweep', lambda: trim_sweep(self.data(), trims), max_trim=max_trim, step=step)
+
+    def plot(self, figure, trim, show=False):
+        """Draw one figure to a PNG; skipped when the same figure was already drawn from the same data"""
+        out = {'trend': 'trend_plot_crosses.png',
+               'filtered': f"filtered_{int(round(trim * 100))}percent.png",
+               'compare': 'model_comparison_crosses.png',
+               'sweep': 'trim_sweep.png'}[figure]
+        marker = os.path.join(self.cache_dir, self._name('plot', figure=figure, trim=trim) + '.done')
+        if self.use_cache and not show and os.path.exists(marker) and os.path.exists(out):
+            return out
+
+        import matplotlib
+        if not show:
+            matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        if figure == 'sweep':
+            sweep = self.sweep()
+            fig, (ax_fit, ax_slope) = plt.subplots(2, 1, figsize=(10, 8), sharex=True)
+            ax_fit.plot(sweep['trim'] * 100, sweep['r2'], 'b-', label='R-squared')
+            ax_rmse = ax_fit.twinx()
+            ax_rmse.plot(sweep['trim'] * 100, sweep['rmse'], 'r-', label='RMSE')
+            ax_fit.set_ylabel('R-squared', color='blue')
+            ax_rmse.set_ylabel('RMSE (%)', color='red')
+            ax_fit.set_title('Model Fit vs Outlier Trim')
+            ax_fit.grid(True)
+            ax_slope.plot(sweep['trim'] * 100, sweep['slope'], 'k-')
+            ax_slope.axvline(trim * 100, color='grey', linestyle='--', label=f"--trim {trim:.0%}")
+            ax_slope.set_xlabel('Temperatures removed from each end (%)')
+            ax_slope.set_ylabel('Slope (% per °C)')
+            ax_slope.legend()
+            ax_slope.grid(True)
+            fig.savefig(out, dpi=300, bbox_inches='tight')
+            if show:
+                plt.show()
+            plt.close(fig)
+            with open(marker, 'w') as f:
+                f.write(out)
+            return out
+
+        df = self.data()
+        plt.figure(figsize=(10, 6))
+        if figure == 'trend':
+            pred = self.predictions()
+            plt.scatter(df['Temperature'], df['Humidity'], color='blue', marker='x', s=50, linewidths=1.5, label='Actual Data')
+            plt.plot(pred['Test_Temperature'], pred['Predicted_Humidity'], color='red', linewidth=2, label='Trend Line')
+            plt.title('Temperature vs Humidity with Linear Regression Trend')
+        elif figure == 'filtered':
+            kept, pred = self.filtered(trim), self.predictions(trim)
+            plt.scatter(kept['Temperature'], kept['Humidity'], marker='x', color='#00008B', s=60, linewidths=1.5,
+                        alpha=0.7, label=f"Filtered Data ({trim:.0%} removed each end)")
+            plt.plot(pred['Test_Temperature'], pred['Predicted_Humidity'], 'r-', linewidth=2, label='Trend Line')
+            plt.title(f"Temperature vs Humidity ({trim:.0%} Outliers Removed)")
+        else:
+            kept = self.filtered(trim)
+            result = self.compare(trim)
+            temps = np.linspace(df['Temperature'].min(), df['Temperature'].max(), 100)
+            plt.scatter(df['Temperature'], df['Humidity'], marker='x', color='red', s=50, linewidths=1.5, alpha=0.6, label='All Data (Original)')
+            plt.scatter(kept['Temperature'], kept['Humidity'], marker='x', color='blue', s=50, linewidths=1.5, alpha=0.8, label='Filtered Data')
+            for name, style in (('original', 'r--'), ('filtered', 'b-')):
+                model = result[name]
+                plt.plot(temps, model['slope'] * temps + model['intercept'], style, label=f"{name.title()} Trend")
+            plt.title('Impact of Outlier Removal on Linear Regression (Cross Markers)')
+        plt.xlabel('Temperature (°C)')
+        plt.ylabel('Humidity (%)')
+        plt.legend()
+        plt.grid(True)
+        plt.savefig(out, dpi=300, bbox_inches='tight')
+        if show:
+            plt.show()
+        plt.close()
+
+        # Remember that this figure is up to date for this data
+        with open(marker, 'w') as f:
+            f.write(out)
+        return out
+
+
+def print_model(title, model):
+    print(f"{title}: Humidity = {model['slope']:.4f}*Temperature + {model['intercept']:.4f}")
+    print(f"  R-squared: {model['r2']:.4f}, standard error: {model['std_error']:.4f}, {model['n']} points, "
+          f"{model['min_temperature']:.1f}°C to {model['max_temperature']:.1f}°C")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cached DHT22 temperature/humidity analysis")
+    parser.add_argument('stages', nargs='+', choices=STAGES + ['all'])
+    parser.add_argument('--input', default=CSV_FILE, help="CSV to analyse (default: the collector's output or its store)")
+    parser.add_argument('--trim', type=float, default=0.05, help="Fraction of temperatures removed from each end")
+    parser.add_argument('--figure', choices=FIGURES + ['all'], default='all')
+    parser.add_argument('--show', action='store_true', help="Open the figures as well as saving them")
+    parser.add_argument('--replicates', type=int, default=REPLICATES, help="Bootstrap resamples")
+    parser.add_argument('--workers', type=int, default=None, help="Bootstrap processes (default: one per CPU)")
+    parser.add_argument('--no-cache', action='store_true', help="Recompute every stage")
+    args = parser.parse_args()
+
+    stages = STAGES if 'all' in args.stages else args.stages
+    pipeline = Pipeline(args.input, use_cache=not args.no_cache)
+    print(f"Input {args.input} (hash {pipeline.key})")
+
+    if 'fit' in stages:
+        print_model("Model", pipeline.fit())
+    if 'predict' in stages:
+        pipeline.predictions().to_csv('predictions.csv', index=False)
+        print("Saved 100 predictions to predictions.csv")
+    if 'filter' in stages:
+        kept = pipeline.filtered(args.trim)
+        kept.to_csv('filtered_data.csv', index=False)
+        print(f"Filtered data: {len(kept)} of {len(pipeline.data())} points kept, saved to filtered_data.csv")
+    if 'compare' in stages:
+        result = pipeline.compare(args.trim)
+        print_model("Original model", result['original'])
+        print_model(f"Filtered model ({args.trim:.0%} trimmed)", result['filtered'])
+        print(f"Change in slope: {result['slope_change']:.4f}, change in intercept: {result['intercept_change']:.4f}")
+    if 'bootstrap' in stages:
+        print_bootstrap(pipeline.bootstrap(args.trim, args.replicates, workers=args.workers))
+    if 'sweep' in stages:
+        sweep = pipeline.sweep()
+        sweep.to_csv('trim_sweep.csv', index=False)
+        print("Trim sweep (every 1%; all steps in trim_sweep.csv):")
+        every = max(int(round(0.01 / SWEEP_STEP)), 1)
+        print(sweep.iloc[::every].to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    if 'plot' in stages:
+        for figure in FIGURES if args.figure == 'all' else [args.figure]:
+            print(f"Figure: {pipeline.plot(figure, args.trim, args.show)}")
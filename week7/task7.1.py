@@ -1,7 +1,16 @@
+import os
+import sys
 import serial
 import csv
 import time
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))  # Shared helpers live in the repo root
+from serial_ingest import SerialIngest, CSVBatchWriter, ConsoleSink, PROFILES
+from column_store import ColumnStore, archive_store
+from pyramid import Pyramid
+from online_regression import OnlineLinearRegression
+from quantile_sketch import QuantileSketch
+
 # Serial port configuration (Update PORT if needed)
 SERIAL_PORT = "COM7"  # For Windows (Check Device Manager)
 # SERIAL_PORT = "/dev/ttyUSB0"  # For Linux
@@ -11,6 +20,12 @@ BAUD_RATE = 9600
 # CSV file setup
 CSV_FILENAME = "dht22_data.csv"
 HEADER = ["Temperature (°C)", "Humidity (%)"]
+STORE_DIR = "dht22_store"  # Columnar copy with timestamps, read by the analysis scripts
+STORE_FLUSH_SECONDS = 2  # Longest the analysis scripts wait to see new readings in the store
+PYRAMID_DIR = os.path.join(STORE_DIR, "pyramid")  # Min/max/mean summaries for plotting long recordings
+MODEL_FILE = "dht22_model.json"  # Live Humidity ~ Temperature fit, updated with every batch of readings
+FORGETTING = 1.0  # e.g. 0.999 to weight recent readings more (memory of about 1000 samples)
+QUANTILES_FILE = "dht22_quantiles.json"  # Temperature quantile sketch for approximate outlier cut-offs (task7.1_6)
 
 # Open serial connection
 try:
@@ -27,18 +42,29 @@ with open(CSV_FILENAME, "w", newline="") as file:
 
     print("Collecting data... Press Ctrl+C to stop.")
 
+    # Temperature and humidity are the last two fields of each line, so the
+    # sketch's millis() prefix is ignored and error lines are counted as garbled
+    # The CSV is rewritten every run, so the store starts afresh too (the previous run is kept aside)
+    previous = archive_store(STORE_DIR)
+    if previous:
+        print(f"Moved the previous run's store to {previous}")
+    store = ColumnStore(STORE_DIR, PROFILES['dht22']['columns'], flush_interval=STORE_FLUSH_SECONDS)
+    pyramid = Pyramid(PYRAMID_DIR, PROFILES['dht22']['columns'], flush_interval=STORE_FLUSH_SECONDS)
+    model = OnlineLinearRegression('Temperature', 'Humidity', forgetting=FORGETTING, state_file=MODEL_FILE)
+    sketch = QuantileSketch('Temperature', state_file=QUANTILES_FILE, source=store.index['created'])
+    ingest = SerialIngest(ser, PROFILES['dht22']['columns'],
+                          [CSVBatchWriter(file, timestamp_format=None), store, pyramid, model, sketch, ConsoleSink()])
+    ingest.start()
     try:
         while True:
-            line = ser.readline().decode("utf-8").strip()  # Read data from serial
-            if line:
-                try:
-                    temp, humid = map(float, line.split(","))  # Parse data
-                    writer.writerow([temp, humid])  # Save to CSV
-                    print(f"Saved: Temperature={temp}°C, Humidity={humid}%")
-                except ValueError:
-                    print("Invalid data received:", line)
+            time.sleep(1)
     except KeyboardInterrupt:
         print("\nData collection stopped.")
+    finally:
+        ingest.stop()
+        print(f"Stats: {ingest.stats()}")
+        print(f"Model: {model.summary()}")
+        print(f"Temperature quantiles: {sketch.summary()}")
 
 # Close serial connection
-ser.close()
\ No newline at end of file
+ser.close()
@@ -1,24 +1,32 @@
-import pandas as pd
 from sklearn.linear_model import LinearRegression
+from dht22_source import load_dht22, load_live_model
 
-# Load data - FIXED escape sequence warning
-df = pd.read_csv('dht22_data.csv')
-df.columns = df.columns.str.replace(r' \(.*\)', '', regex=True).str.strip()
+USE_LIVE_MODEL = False  # True to reuse task7.1.py's running fit instead of refitting, when it matches the data
 
-# Prepare data (X = Temperature, y = Humidity)
-X = df[['Temperature']]
-y = df['Humidity']
+# Load data
+df = load_dht22()  # Pass start=/end= to load only a time range
+live_model = load_live_model(df) if USE_LIVE_MODEL else None
 
-# Train model
-model = LinearRegression()
-model.fit(X, y)
+if live_model is not None:
+    slope, intercept, r2 = live_model.slope, live_model.intercept, live_model.r2
+    print(f"Live Linear Regression Model ({live_model.n} readings, updated by task7.1.py):")
+else:
+    # Prepare data (X = Temperature, y = Humidity)
+    X = df[['Temperature']]
+    y = df['Humidity']
+
+    # Train model
+    model = LinearRegression()
+    model.fit(X, y)
+    slope, intercept, r2 = model.coef_[0], model.intercept_, model.score(X, y)
+    print("Linear Regression Model Trained:")
 
 # Print model coefficients
-print("Linear Regression Model Trained:")
-print(f"Slope (Coefficient): {model.coef_[0]:.4f}")
-print(f"Intercept: {model.intercept_:.4f}")
-print(f"Equation: Humidity = {model.coef_[0]:.4f} * Temperature + {model.intercept_:.4f}")
+print(f"Slope (Coefficient): {slope:.4f}")
+print(f"Intercept: {intercept:.4f}")
+print(f"Equation: Humidity = {slope:.4f} * Temperature + {intercept:.4f}")
 
 # Additional diagnostics
-r2 = model.score(X, y)
-print(f"R-squared: {r2:.4f} (Explains {r2*100:.1f}% of variance)")
\ No newline at end of file
+print(f"R-squared: {r2:.4f} (Explains {r2*100:.1f}% of variance)")
+if live_model is not None:
+    print(f"Residual std: {live_model.residual_std:.4f}")
\ No newline at end of file
@@ -1,20 +1,29 @@
 import numpy as np
 import pandas as pd
 from sklearn.linear_model import LinearRegression
+from dht22_source import load_dht22, load_live_model
 
-# Load data and model (from Step 3)
-df = pd.read_csv('dht22_data.csv')
-df.columns = df.columns.str.replace(r' \(.*\)', '', regex=True).str.strip()
-X = df[['Temperature']]
-y = df['Humidity']
+USE_LIVE_MODEL = False  # True to reuse task7.1.py's running fit instead of refitting, when it matches the data
 
-# Train model
-model = LinearRegression().fit(X, y)
+df = load_dht22()  # Pass start=/end= to load only a time range
+live_model = load_live_model(df) if USE_LIVE_MODEL else None
 
-# Generate 100 test temperatures between min and max
-test_temps = np.linspace(X.min().iloc[0], X.max().iloc[0], 100).reshape(-1, 1)
-test_temps_df = pd.DataFrame(test_temps, columns=['Temperature'])  # Ensure feature names match
-predicted_humidity = model.predict(test_temps_df)
+if live_model is not None:
+    # Generate 100 test temperatures between min and max
+    test_temps = np.linspace(live_model.min_x, live_model.max_x, 100).reshape(-1, 1)
+    predicted_humidity = live_model.predict(test_temps.flatten())
+else:
+    # Model from Step 3
+    X = df[['Temperature']]
+    y = df['Humidity']
+
+    # Train model
+    model = LinearRegression().fit(X, y)
+
+    # Generate 100 test temperatures between min and max
+    test_temps = np.linspace(X.min().iloc[0], X.max().iloc[0], 100).reshape(-1, 1)
+    test_temps_df = pd.DataFrame(test_temps, columns=['Temperature'])  # Ensure feature names match
+    predicted_humidity = model.predict(test_temps_df)
 
 # Save predictions to CSV
 predictions = pd.DataFrame({
@@ -1,10 +1,10 @@
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
+from dht22_source import load_dht22
 
 # Load original data and predictions
-df = pd.read_csv('dht22_data.csv')
-df.columns = df.columns.str.replace(r' \(.*\)', '', regex=True).str.strip()
+df = load_dht22()  # Pass start=/end= to load only a time range
 predictions = pd.read_csv('predictions.csv')
 
 # Create plot with crosses for data points
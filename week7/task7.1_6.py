@@ -1,18 +1,31 @@
-import pandas as pd
+from dht22_source import load_dht22, temperature_sketch, filter_dht22
 
-# Load and clean data - fixed escape sequence warning
-df = pd.read_csv('dht22_data.csv')
-df.columns = df.columns.str.replace(r' \(.*\)', '', regex=True).str.strip()
+APPROXIMATE = False  # True for data too big to load at once: sketched cut-offs, filtered chunk by chunk
 
-# Remove top/bottom 5% temperatures
-lower = df['Temperature'].quantile(0.05)
-upper = df['Temperature'].quantile(0.95)
-filtered_df = df[(df['Temperature'] >= lower) & (df['Temperature'] <= upper)]
+if APPROXIMATE:
+    # Top/bottom 5% cut-offs from a quantile sketch (task7.1.py's, or built in one pass over the data)
+    sketch = temperature_sketch()
+    lower, upper = sketch.quantile([0.05, 0.95])
+    print(f"Approximate cut-offs {lower:.1f}°C and {upper:.1f}°C (within {sketch.rank_error():.2%} of the data in rank)")
+    kept, total, lowest, highest = filter_dht22(lower, upper, 'filtered_data.csv')
 
-# Save filtered data
-filtered_df.to_csv('filtered_data.csv', index=False)
+    # Print summary
+    print(f"Original data: {total} points")
+    print(f"Filtered data: {kept} points (removed {total-kept})")
+    print(f"New temperature range: {lowest:.1f}°C to {highest:.1f}°C")
+else:
+    # Load and clean data - fixed escape sequence warning
+    df = load_dht22()  # Pass start=/end= to load only a time range
 
-# Print summary
-print(f"Original data: {len(df)} points")
-print(f"Filtered data: {len(filtered_df)} points (removed {len(df)-len(filtered_df)})")
-print(f"New temperature range: {filtered_df['Temperature'].min():.1f}°C to {filtered_df['Temperature'].max():.1f}°C")
\ No newline at end of file
+    # Remove top/bottom 5% temperatures
+    lower = df['Temperature'].quantile(0.05)
+    upper = df['Temperature'].quantile(0.95)
+    filtered_df = df[(df['Temperature'] >= lower) & (df['Temperature'] <= upper)]
+
+    # Save filtered data
+    filtered_df.to_csv('filtered_data.csv', index=False)
+
+    # Print summary
+    print(f"Original data: {len(df)} points")
+    print(f"Filtered data: {len(filtered_df)} points (removed {len(df)-len(filtered_df)})")
+    print(f"New temperature range: {filtered_df['Temperature'].min():.1f}°C to {filtered_df['Temperature'].max():.1f}°C")
\ No newline at end of file
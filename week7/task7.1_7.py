@@ -1,11 +1,10 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.linear_model import LinearRegression
+from dht22_source import load_dht22
 
 # Load and filter data
-df = pd.read_csv('dht22_data.csv')
-df.columns = df.columns.str.replace(r' \(.*\)', '', regex=True).str.strip()
+df = load_dht22()  # Pass start=/end= to load only a time range
 filtered_df = df[(df['Temperature'] >= df['Temperature'].quantile(0.05)) & 
                 (df['Temperature'] <= df['Temperature'].quantile(0.95))]
 
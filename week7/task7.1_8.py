@@ -1,13 +1,11 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.linear_model import LinearRegression
+from dht22_source import load_dht22
 
 def load_and_clean_data(filename):
     """Load and clean data, handling column names"""
-    df = pd.read_csv(filename)
-    df.columns = df.columns.str.replace(r' \(.*\)', '', regex=True).str.strip()
-    return df
+    return load_dht22(filename)
 
 try:
     # Load data
@@ -8,28 +8,57 @@ from bokeh.palettes import Category10
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))  # Shared helpers live in the repo root
+from column_store import StoreTailer, has_store
+from csv_tail import CSVTailer
+from running_stats import ChunkedStats
 
 # Configuration
 CSV_FILE = 'gyroscope_data.csv'
+STORE_DIR = 'gyro_store'  # Columnar copy written by data.py; read instead of the CSV when present
+HISTORY_SECONDS = None  # e.g. 3600 to only load the last hour from the store
+
+def prepare(chunk):
+    if 'timestamp' not in chunk.columns:
+        chunk['timestamp'] = pd.to_datetime(chunk.index, unit='s')  # Index carries on across chunks
+    else:
+        chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+    return chunk
+
+# Follows the CSV (or the store) so a refresh only reads the rows appended since the last one
+tailer = CSVTailer(CSV_FILE, prepare=prepare)
+store_tailer = StoreTailer(STORE_DIR, HISTORY_SECONDS)
 
 # Load initial data
 def load_data(file_path=CSV_FILE):
+    # Returns (data, new_rows); new_rows is None when the file was truncated or rotated
     try:
-        data = pd.read_csv(file_path)
-        if 'timestamp' not in data.columns:
-            data['timestamp'] = pd.to_datetime(data.index, unit='s')
-        else:
-            data['timestamp'] = pd.to_datetime(data['timestamp'])
-        return data
+        data, chunk, reset = (store_tailer if has_store(STORE_DIR) else tailer).update()
+        return data, None if reset else chunk
     except Exception as e:
         print(f"Error loading data: {e}")
-        return pd.DataFrame(columns=['timestamp', 'x', 'y', 'z'])  # Return empty DataFrame in case of error
+        return pd.DataFrame(columns=['timestamp', 'x', 'y', 'z']), None  # Return empty DataFrame in case of error
 
 # Initialize data
-data = load_data()
-source = ColumnDataSource(data=data)
+data, _ = load_data()
+print(f"Reading {'the column store in ' + STORE_DIR if has_store(STORE_DIR) else CSV_FILE} ({len(data)} samples so far)")
+stats = ChunkedStats(['x', 'y', 'z'])  # Per-chunk moments for the summary table and box plot
+stats.sync(data)
+source = ColumnDataSource(data=dict(timestamp=[], x=[], y=[], z=[]))  # The window on screen; filled by update_data()
 source_summary = ColumnDataSource(data=dict())
 
+# Aggregate sources for the chart types that don't plot raw samples; their glyphs
+# stay put and only these small tables are replaced when new data arrives
+hist_sources = {axis: ColumnDataSource(data=dict(top=[], left=[], right=[])) for axis in ['x', 'y', 'z']}
+box_sources = {axis: ColumnDataSource(data=dict(x=[], q1=[], q2=[], q3=[], lower=[], upper=[])) for axis in ['x', 'y', 'z']}
+violin_sources = {axis: ColumnDataSource(data=dict(top=[], bottom=[], left=[], right=[])) for axis in ['x', 'y', 'z']}
+heatmap_source = ColumnDataSource(data=dict(image=[], x=[], y=[], dw=[], dh=[]))  # One image, variables x time index
+
+# What the browser currently has, so update_data() only sends what changed
+shown = {'samples': None, 'view': None, 'rows': None}  # rows: index label after the last row sent
+
 # Create plot
 plot = figure(title="Gyroscope Data Dashboard", 
               x_axis_type='datetime',
@@ -78,149 +107,197 @@ summary_columns = [
 ]
 summary_table = DataTable(source=source_summary, columns=summary_columns, width=800, height=150)
 
-# Update function with fixed graph types
+def window(df):
+    return dict(timestamp=df['timestamp'], x=df['x'], y=df['y'], z=df['z'])
+
+def reload_data():
+    # Reload if the data has changed; returns the rows newer than what's on screen (None if nothing changed)
+    global data
+    if has_store(STORE_DIR):
+        current_modified = store_tailer.version()  # The writer republishes index.json with every flush
+    elif os.path.exists(CSV_FILE):
+        current_modified = os.path.getmtime(CSV_FILE)
+    else:
+        return None
+    if hasattr(update_data, 'last_modified') and current_modified <= update_data.last_modified:
+        return None
+    new_data, new_rows = load_data()
+    if new_data.empty:
+        return None
+    data = new_data
+    sample_slider.end = len(data)
+    # A sliding store window or a rotated CSV no longer extends what stats has seen
+    stats.sync(data, reset=new_rows is None or (has_store(STORE_DIR) and HISTORY_SECONDS is not None))
+    update_data.last_modified = current_modified
+    status_div.text = f"<p>Loaded {len(data)} samples from {CSV_FILE} (updated)</p>"
+    if new_rows is None:  # The CSV was truncated/rotated: send the whole window again
+        shown['samples'] = None
+        return data
+    if shown['rows'] is not None:
+        # By row number, not timestamp: rows of one serial batch can share a timestamp
+        new_rows = new_rows[new_rows.index >= shown['rows']]
+    return new_rows
+
+def build_renderers(graph_type, var):
+    # Create the glyphs for a graph type/variable; only called when one of them changes
+    for axis in renderers:
+        for r in renderers[axis]:
+            plot.renderers.remove(r)
+        renderers[axis] = []
+    plot.legend.items = []
+
+    # Adjust plot axes based on graph type
+    plot.xaxis.axis_label = "Timestamp" if graph_type in ["Line", "Scatter", "Bar"] else "Variable/Value"
+    plot.yaxis.axis_label = "Angular Velocity (rad/s)" if graph_type in ["Line", "Scatter", "Bar"] else "Value/Count"
+
+    # Plot based on graph type
+    if graph_type == "Line":
+        if var in ["All", "X"]:
+            renderers['x'] = [plot.line('timestamp', 'x', source=source, color=colors[0], legend_label="X", line_width=2)]
+        if var in ["All", "Y"]:
+            renderers['y'] = [plot.line('timestamp', 'y', source=source, color=colors[1], legend_label="Y", line_width=2)]
+        if var in ["All", "Z"]:
+            renderers['z'] = [plot.line('timestamp', 'z', source=source, color=colors[2], legend_label="Z", line_width=2)]
+
+    elif graph_type == "Scatter":
+        if var in ["All", "X"]:
+            renderers['x'] = [plot.scatter('timestamp', 'x', source=source, color=colors[0], legend_label="X", size=8)]
+        if var in ["All", "Y"]:
+            renderers['y'] = [plot.scatter('timestamp', 'y', source=source, color=colors[1], legend_label="Y", size=8)]
+        if var in ["All", "Z"]:
+            renderers['z'] = [plot.scatter('timestamp', 'z', source=source, color=colors[2], legend_label="Z", size=8)]
+
+    elif graph_type == "Distribution":
+        plot.x_range.start = None  # Reset range for non-datetime
+        plot.x_range.end = None
+        plot.xaxis.axis_label = "Value"
+        plot.yaxis.axis_label = "Count"
+        for axis in ['x', 'y', 'z']:
+            if var in ["All", axis.upper()]:
+                renderers[axis] = [plot.quad(top='top', bottom=0, left='left', right='right', source=hist_sources[axis],
+                                            fill_color=colors[['x', 'y', 'z'].index(axis)],
+                                            line_color="white", legend_label=axis.upper())]
+
+    elif graph_type == "Bar":
+        # Bar width follows the time range; refresh_aggregates() keeps it up to date
+        if var in ["All", "X"]:
+            renderers['x'] = [plot.vbar(x='timestamp', top='x', source=source, width=0.9,
+                                       fill_color=colors[0], legend_label="X")]
+        if var in ["All", "Y"]:
+            renderers['y'] = [plot.vbar(x='timestamp', top='y', source=source, width=0.9,
+                                       fill_color=colors[1], legend_label="Y")]
+        if var in ["All", "Z"]:
+            renderers['z'] = [plot.vbar(x='timestamp', top='z', source=source, width=0.9,
+                                       fill_color=colors[2], legend_label="Z")]
+
+    elif graph_type == "Box":
+        plot.xaxis.axis_label = "Variable"
+        plot.yaxis.axis_label = "Value"
+        plot.x_range.start = None  # Reset datetime range
+        plot.x_range.end = None
+        plot.xaxis[0].ticker = [0, 1, 2]  # Fixed positions for x, y, z
+        plot.xaxis.major_label_overrides = {0: "X", 1: "Y", 2: "Z"}
+        for i, axis in enumerate(['x', 'y', 'z']):
+            if var in ["All", axis.upper()]:
+                box = box_sources[axis]
+                renderers[axis] = [
+                    plot.vbar(x='x', top='q3', bottom='q1', source=box, width=0.4, fill_color=colors[i], legend_label=axis.upper()),
+                    plot.segment(x0='x', y0='lower', x1='x', y1='upper', source=box, color="black"),
+                    plot.scatter(x='x', y='q2', source=box, size=10, color="black", legend_label=axis.upper() + " Median")
+                ]
+
+    elif graph_type == "Violin":
+        plot.xaxis.axis_label = "Variable"
+        plot.yaxis.axis_label = "Density"
+        plot.x_range.start = None
+        plot.x_range.end = None
+        plot.xaxis[0].ticker = [0, 1, 2]
+        plot.xaxis.major_label_overrides = {0: "X", 1: "Y", 2: "Z"}
+        for i, axis in enumerate(['x', 'y', 'z']):
+            if var in ["All", axis.upper()]:
+                # One glyph per axis; each row of its source is one histogram bin
+                renderers[axis] = [plot.quad(top='top', bottom='bottom', left='left', right='right', source=violin_sources[axis],
+                                            fill_color=colors[i], alpha=0.5, legend_label=axis.upper())]
+
+    elif graph_type == "Heatmap":
+        plot.xaxis.axis_label = "Time Index"
+        plot.yaxis.axis_label = "Variable"
+        plot.x_range.start = None
+        plot.y_range.start = None
+        plot.grid.grid_line_color = None
+        renderers['x'] = [plot.image(image='image', x='x', y='y', dw='dw', dh='dh', source=heatmap_source,
+                                    palette="Viridis256")]
+
+    plot.legend.location = "top_left"
+    plot.legend.click_policy = "hide"
+    plot.legend.background_fill_alpha = 0.5
+
+def refresh_aggregates(graph_type, display_data, summary):
+    # Recompute the small derived tables for the current window; the glyphs themselves are untouched
+    if graph_type == "Distribution":
+        for axis in ['x', 'y', 'z']:
+            hist, edges = np.histogram(display_data[axis], bins=20)
+            hist_sources[axis].data = dict(top=hist, left=edges[:-1], right=edges[1:])
+
+    elif graph_type == "Bar":
+        time_range = (display_data['timestamp'].max() - display_data['timestamp'].min()).total_seconds() * 1000
+        bar_width = time_range / len(display_data) * 0.8 if len(display_data) > 0 else 0.9
+        for axis in renderers:
+            for r in renderers[axis]:
+                r.glyph.width = bar_width
+
+    elif graph_type == "Box":
+        for i, axis in enumerate(['x', 'y', 'z']):
+            q1, q2, q3 = summary.loc[['25%', '50%', '75%'], axis]
+            iqr = q3 - q1
+            upper = min(q3 + 1.5 * iqr, summary.at['max', axis])
+            lower = max(q1 - 1.5 * iqr, summary.at['min', axis])
+            box_sources[axis].data = dict(x=[i], q1=[q1], q2=[q2], q3=[q3], lower=[lower], upper=[upper])
+
+    elif graph_type == "Violin":
+        for i, axis in enumerate(['x', 'y', 'z']):
+            hist, edges = np.histogram(display_data[axis], bins=20, density=True)
+            hist = hist / hist.max() * 0.4  # Normalize and scale width
+            violin_sources[axis].data = dict(top=edges[1:], bottom=edges[:-1], left=i - hist, right=i + hist)
+
+    elif graph_type == "Heatmap":
+        # Row i of the image is variable i, column j is sample j, centred on integer positions like the old rects
+        hm_data = display_data[['x', 'y', 'z']].to_numpy(dtype=np.float64).T
+        heatmap_source.data = dict(image=[hm_data], x=[-0.5], y=[-0.5], dw=[hm_data.shape[1]], dh=[3])
+
+# Update function: streams new rows and only rebuilds glyphs when the view changes
 def update_data():
-    global data, renderers, plot
     try:
-        # Reload data if file has changed
-        if os.path.exists(CSV_FILE):
-            current_modified = os.path.getmtime(CSV_FILE)
-            if not hasattr(update_data, 'last_modified') or current_modified > update_data.last_modified:
-                new_data = load_data()
-                if not new_data.empty:
-                    data = new_data
-                    sample_slider.end = len(data)
-                    update_data.last_modified = current_modified
-                    status_div.text = f"<p>Loaded {len(data)} samples from {CSV_FILE} (updated)</p>"
+        new_rows = reload_data()
 
         # Get current display settings
         samples = sample_slider.value
         var = variable_select.value
         graph_type = graph_select.value
-        
-        # Update data source
         display_data = data.tail(samples)
-        source.data = dict(
-            timestamp=display_data['timestamp'],
-            x=display_data['x'],
-            y=display_data['y'],
-            z=display_data['z']
-        )
-        
+
+        # Update data source: a new window size replaces the data, otherwise only
+        # the new rows are sent and rollover drops the oldest ones in the browser
+        if samples != shown['samples']:
+            source.data = window(display_data)
+        elif new_rows is not None and len(new_rows):
+            source.stream(window(new_rows.tail(samples)), rollover=samples)
+        elif shown['view'] == (graph_type, var):
+            return  # Nothing changed
+        shown['samples'] = samples
+        if len(display_data):
+            shown['rows'] = display_data.index[-1] + 1
+
         # Update summary data
-        summary = display_data[['x', 'y', 'z']].describe().reset_index()
+        window_stats = stats.describe(-samples)
+        summary = window_stats.reset_index()
         summary.columns = ['stat'] + list(summary.columns[1:])
         source_summary.data = summary
 
-        # Clear previous renderers
-        for axis in renderers:
-            for r in renderers[axis]:
-                plot.renderers.remove(r)
-            renderers[axis] = []
-
-        # Adjust plot axes based on graph type
-        plot.xaxis.axis_label = "Timestamp" if graph_type in ["Line", "Scatter", "Bar"] else "Variable/Value"
-        plot.yaxis.axis_label = "Angular Velocity (rad/s)" if graph_type in ["Line", "Scatter", "Bar"] else "Value/Count"
-
-        # Plot based on graph type
-        if graph_type == "Line":
-            if var in ["All", "X"]:
-                renderers['x'] = [plot.line('timestamp', 'x', source=source, color=colors[0], legend_label="X", line_width=2)]
-            if var in ["All", "Y"]:
-                renderers['y'] = [plot.line('timestamp', 'y', source=source, color=colors[1], legend_label="Y", line_width=2)]
-            if var in ["All", "Z"]:
-                renderers['z'] = [plot.line('timestamp', 'z', source=source, color=colors[2], legend_label="Z", line_width=2)]
-
-        elif graph_type == "Scatter":
-            if var in ["All", "X"]:
-                renderers['x'] = [plot.scatter('timestamp', 'x', source=source, color=colors[0], legend_label="X", size=8)]
-            if var in ["All", "Y"]:
-                renderers['y'] = [plot.scatter('timestamp', 'y', source=source, color=colors[1], legend_label="Y", size=8)]
-            if var in ["All", "Z"]:
-                renderers['z'] = [plot.scatter('timestamp', 'z', source=source, color=colors[2], legend_label="Z", size=8)]
-
-        elif graph_type == "Distribution":
-            plot.x_range.start = None  # Reset range for non-datetime
-            plot.x_range.end = None
-            plot.xaxis.axis_label = "Value"
-            plot.yaxis.axis_label = "Count"
-            for axis in ['x', 'y', 'z']:
-                if var in ["All", axis.upper()]:
-                    hist, edges = np.histogram(display_data[axis], bins=20)
-                    renderers[axis] = [plot.quad(top=hist, bottom=0, left=edges[:-1], right=edges[1:], 
-                                                fill_color=colors[['x', 'y', 'z'].index(axis)], 
-                                                line_color="white", legend_label=axis.upper())]
-
-        elif graph_type == "Bar":
-            # Adjust bar width based on time range
-            time_range = (display_data['timestamp'].max() - display_data['timestamp'].min()).total_seconds() * 1000
-            bar_width = time_range / samples * 0.8 if samples > 0 else 0.9
-            if var in ["All", "X"]:
-                renderers['x'] = [plot.vbar(x='timestamp', top='x', source=source, width=bar_width, 
-                                           fill_color=colors[0], legend_label="X")]
-            if var in ["All", "Y"]:
-                renderers['y'] = [plot.vbar(x='timestamp', top='y', source=source, width=bar_width, 
-                                           fill_color=colors[1], legend_label="Y")]
-            if var in ["All", "Z"]:
-                renderers['z'] = [plot.vbar(x='timestamp', top='z', source=source, width=bar_width, 
-                                           fill_color=colors[2], legend_label="Z")]
-
-        elif graph_type == "Box":
-            plot.xaxis.axis_label = "Variable"
-            plot.yaxis.axis_label = "Value"
-            plot.x_range.start = None  # Reset datetime range
-            plot.x_range.end = None
-            plot.xaxis[0].ticker = [0, 1, 2]  # Fixed positions for x, y, z
-            plot.xaxis.major_label_overrides = {0: "X", 1: "Y", 2: "Z"}
-            for i, axis in enumerate(['x', 'y', 'z']):
-                if var in ["All", axis.upper()]:
-                    q1, q2, q3 = display_data[axis].quantile([0.25, 0.5, 0.75])
-                    iqr = q3 - q1
-                    upper = min(q3 + 1.5 * iqr, display_data[axis].max())
-                    lower = max(q1 - 1.5 * iqr, display_data[axis].min())
-                    renderers[axis] = [
-                        plot.vbar(x=[i], top=[q3], bottom=[q1], width=0.4, fill_color=colors[i], legend_label=axis.upper()),
-                        plot.segment(x0=[i], y0=[lower], x1=[i], y1=[upper], color="black"),
-                        plot.scatter(x=[i], y=[q2], size=10, color="black", legend_label=axis.upper() + " Median")
-                    ]
-
-        elif graph_type == "Violin":
-            plot.xaxis.axis_label = "Variable"
-            plot.yaxis.axis_label = "Density"
-            plot.x_range.start = None
-            plot.x_range.end = None
-            plot.xaxis[0].ticker = [0, 1, 2]
-            plot.xaxis.major_label_overrides = {0: "X", 1: "Y", 2: "Z"}
-            for i, axis in enumerate(['x', 'y', 'z']):
-                if var in ["All", axis.upper()]:
-                    hist, edges = np.histogram(display_data[axis], bins=20, density=True)
-                    hist = hist / hist.max() * 0.4  # Normalize and scale width
-                    for h, left, right in zip(hist, edges[:-1], edges[1:]):
-                        renderers[axis].append(plot.quad(top=right, bottom=left, left=i-h, right=i+h, 
-                                                        fill_color=colors[i], alpha=0.5, legend_label=axis.upper()))
-
-        elif graph_type == "Heatmap":
-            plot.xaxis.axis_label = "Time Index"
-            plot.yaxis.axis_label = "Variable"
-            plot.x_range.start = None
-            plot.y_range.start = None
-            hm_data = display_data[['x', 'y', 'z']].values.T
-            x_indices = np.arange(len(display_data))
-            y_indices = [0, 1, 2]  # For x, y, z
-            x_grid, y_grid = np.meshgrid(x_indices, y_indices)
-            hm_source = ColumnDataSource(dict(
-                x=x_grid.flatten(),
-                y=y_grid.flatten(),
-                values=hm_data.flatten()
-            ))
-            plot.grid.grid_line_color = None
-            renderers['x'] = [plot.rect(x='x', y='y', width=1, height=1, source=hm_source, 
-                                       fill_color={'field': 'values', 'transform': {'palette': "Viridis256"}},
-                                       line_color=None)]
-
-        plot.legend.location = "top_left"
-        plot.legend.click_policy = "hide"
-        plot.legend.background_fill_alpha = 0.5
+        if shown['view'] != (graph_type, var):
+            build_renderers(graph_type, var)
+            shown['view'] = (graph_type, var)
+        refresh_aggregates(graph_type, display_data, window_stats)
 
     except Exception as e:
         status_div.text = f"<p style='color:red'>Error updating data: {str(e)}</p>"
@@ -265,10 +342,12 @@ next_button.on_click(next_button_click)
 auto_update.on_click(toggle_auto_update)
 
 # File watcher setup
+doc = curdoc()
 class CSVHandler(FileSystemEventHandler):
     def on_modified(self, event):
         if event.src_path.endswith(CSV_FILE):
-            update_data()
+            # Watchdog calls this from its own thread; Bokeh documents may only be changed on the server's loop
+            doc.add_next_tick_callback(update_data)
 
 if os.path.exists(CSV_FILE):
     observer = Observer()
@@ -1,11 +1,21 @@
+import os
+import sys
 import serial
 import csv
 import time
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))  # Shared helpers live in the repo root
+from serial_ingest import SerialIngest, CSVBatchWriter, ConsoleSink, PROFILES
+from column_store import ColumnStore, archive_store
+from pyramid import Pyramid
+
 # Serial port configuration
 SERIAL_PORT = "COM7"  # Your Arduino's serial port
 BAUD_RATE = 115200
 CSV_FILE = "gyroscope_data.csv"
+STORE_DIR = "gyro_store"  # Columnar copy the dashboards can read by time range
+STORE_FLUSH_SECONDS = 2  # Longest the dashboards wait to see new samples in the store
+PYRAMID_DIR = os.path.join(STORE_DIR, "pyramid")  # Min/max/mean summaries for zoomed-out views
 
 # Open serial connection
 ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
@@ -15,19 +25,26 @@ time.sleep(2)  # Allow time for Arduino to initialize
 with open(CSV_FILE, "w", newline="") as file:
     writer = csv.writer(file)
 
-    # Read and write header
-    header = ser.readline().decode().strip()
-    writer.writerow(header.split(","))
+    # Skip the sketch's header and write our own (the fake _id/_rev fields aren't logged)
+    ser.readline()
+    writer.writerow(['timestamp'] + PROFILES['gyro']['columns'])
 
     print(f"Logging data to {CSV_FILE}... Press Ctrl+C to stop.")
 
+    # The CSV is rewritten every run, so the store starts afresh too (the previous run is kept aside)
+    previous = archive_store(STORE_DIR)
+    if previous:
+        print(f"Moved the previous run's store to {previous}")
+    store = ColumnStore(STORE_DIR, PROFILES['gyro']['columns'], flush_interval=STORE_FLUSH_SECONDS)
+    pyramid = Pyramid(PYRAMID_DIR, PROFILES['gyro']['columns'], flush_interval=STORE_FLUSH_SECONDS)
+    ingest = SerialIngest(ser, PROFILES['gyro']['columns'], [CSVBatchWriter(file), store, pyramid, ConsoleSink()])
+    ingest.start()
     try:
         while True:
-            line = ser.readline().decode().strip()
-            if line:
-                writer.writerow(line.split(","))
-                print(line)  # Display real-time readings
+            time.sleep(1)
     except KeyboardInterrupt:
         print("\nData logging stopped.")
     finally:
+        ingest.stop()
+        print(f"Stats: {ingest.stats()}")
         ser.close()
@@ -1,11 +1,22 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import time
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import os
+import time
 from datetime import datetime
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))  # Shared helpers live in the repo root
+from column_store import StoreTailer, has_store
+from csv_tail import CSVTailer
+from running_stats import ChunkedStats
+
+CSV_FILE = 'gyroscope_data.csv'
+STORE_DIR = 'gyro_store'  # Columnar copy written by data.py; read instead of the CSV when present
+HISTORY_SECONDS = None  # e.g. 3600 to only load the last hour from the store
+REFRESH_SECONDS = 2  # How often the live view checks for new data
 
 # Set page config
 st.set_page_config(page_title="Gyroscope Dashboard", layout="wide")
@@ -27,41 +38,171 @@ st.markdown("""
 
 # File watcher for continuous data updates
 class CSVHandler(FileSystemEventHandler):
-    def __init__(self, callback):
-        self.callback = callback
+    # Only counts changes; viewers compare the count on their own timer, so a burst
+    # of writes between two refreshes costs a single reload
+    def __init__(self, file_path):
+        self.file_name = os.path.basename(file_path)
+        self.version = 0
     
     def on_modified(self, event):
-        if event.src_path.endswith('.csv'):
-            self.callback()
+        if os.path.basename(event.src_path) == self.file_name:
+            self.version += 1
 
-# Load data function with caching
-@st.cache_data(ttl=10)  # Refresh cache every 10 seconds
-def load_data(file_path='gyroscope_data.csv'):
+# One watcher for the whole server instead of one per viewer
+@st.cache_resource
+def start_watcher(file_path=CSV_FILE):
     try:
-        data = pd.read_csv(file_path)
-        # Convert timestamp to datetime if it exists
-        if 'timestamp' in data.columns:
-            try:
-                data['timestamp'] = pd.to_datetime(data['timestamp'])
-            except:
-                # If conversion fails, create a simple timestamp
-                data['timestamp'] = pd.to_datetime(data.index, unit='s')
-        return data
+        handler = CSVHandler(file_path)
+        observer = Observer()
+        observer.schedule(handler, os.path.dirname(os.path.abspath(file_path)), recursive=False)
+        observer.start()
+        return handler
+    except Exception as e:
+        print(f"Could not set up file watcher: {e}")
+        return None
+
+def data_version():
+    if has_store(STORE_DIR):
+        return get_store_tailer().version()  # The writer republishes index.json with every flush
+    handler = start_watcher()
+    if handler is None:  # No watcher: treat the data as changed once per refresh period
+        return int(time.time() // REFRESH_SECONDS)
+    return handler.version
+
+def prepare(chunk):
+    # Convert timestamp to datetime if it exists
+    if 'timestamp' in chunk.columns:
+        try:
+            chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+        except:
+            # If conversion fails, create a simple timestamp (the index carries on across chunks)
+            chunk['timestamp'] = pd.to_datetime(chunk.index, unit='s')
+    return chunk
+
+# One tailer per file for the whole server, so each refresh only parses newly appended rows
+@st.cache_resource
+def get_tailer(file_path):
+    return CSVTailer(file_path, prepare=prepare)
+
+# Per-chunk moments of the loaded rows, shared like the tailer, for the summary table
+@st.cache_resource
+def get_stats():
+    return ChunkedStats(['x', 'y', 'z'])
+
+# Same for the store: each refresh only reads the rows published since the last one
+@st.cache_resource
+def get_store_tailer():
+    return StoreTailer(STORE_DIR, HISTORY_SECONDS)
+
+def load_data(file_path=CSV_FILE):
+    # Returns (data, reset); reset is True when the file or store was replaced
+    try:
+        data, _, reset = (get_store_tailer() if has_store(STORE_DIR) else get_tailer(file_path)).update()
+        return data, reset
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
-        return pd.DataFrame(columns=['timestamp', 'x', 'y', 'z'])
+        return pd.DataFrame(columns=['timestamp', 'x', 'y', 'z']), True
+
+# The data as of a watcher version, loaded once and shared by every viewer on that version
+@st.cache_resource(max_entries=2)
+def snapshot(version):
+    data, reset = load_data()
+    get_stats().sync(data, reset=reset or (has_store(STORE_DIR) and HISTORY_SECONDS is not None))  # A sliding window can't be extended
+    return data
+
+# Figures are shared the same way: viewers looking at the same page of the same data reuse one
+@st.cache_resource(max_entries=32)
+def build_figure(version, graph_type, selected_vars, start_idx, end_idx):
+    display_data = snapshot(version).iloc[start_idx:end_idx]
+    selected_vars = list(selected_vars)
+    if graph_type == "Line Chart":
+        return px.line(
+            display_data,
+            x='timestamp' if 'timestamp' in display_data.columns else display_data.index,
+            y=selected_vars,
+            title=f"Gyroscope Data - {graph_type}",
+            labels={'value': 'Angular Velocity (rad/s)'}
+        )
+    elif graph_type == "Scatter Plot":
+        return px.scatter(
+            display_data,
+            x=selected_vars[0],
+            y=selected_vars[1],
+            title=f"Gyroscope Data - {graph_type}",
+            labels={'value': 'Angular Velocity (rad/s)'}
+        )
+    elif graph_type == "Histogram":
+        return px.histogram(
+            display_data,
+            x=selected_vars,
+            title=f"Gyroscope Data - {graph_type}",
+            labels={'value': 'Angular Velocity (rad/s)'},
+            marginal="rug",
+            barmode="overlay"
+        )
+    elif graph_type == "Box Plot":
+        return px.box(
+            display_data,
+            y=selected_vars,
+            title=f"Gyroscope Data - {graph_type}",
+            labels={'value': 'Angular Velocity (rad/s)'}
+        )
+    elif graph_type == "Violin Plot":
+        return px.violin(
+            display_data,
+            y=selected_vars,
+            title=f"Gyroscope Data - {graph_type}",
+            labels={'value': 'Angular Velocity (rad/s)'},
+            box=True
+        )
 
 # Initialize session state for pagination
 if 'page_num' not in st.session_state:
     st.session_state.page_num = 0
 
+# Chart and tables; in live mode only this part re-runs, on its own timer
+def live_view(graph_type, selected_vars, samples_per_page):
+    version = data_version()
+    data = snapshot(version)
+
+    # Calculate data range to display
+    start_idx = st.session_state.page_num * samples_per_page
+    end_idx = start_idx + samples_per_page
+    display_data = data.iloc[start_idx:end_idx]
+    
+    # Main visualization area
+    st.header("Data Visualization")
+    
+    if graph_type == "Scatter Plot" and len(selected_vars) < 2:
+        st.warning("Select at least 2 variables for scatter plot")
+        return
+    try:
+        fig = build_figure(version, graph_type, tuple(selected_vars), start_idx, end_idx)
+        
+        # Display the plot
+        st.plotly_chart(fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error creating visualization: {str(e)}")
+    
+    # Data summary table
+    st.header("Data Summary")
+    summary_data = get_stats().describe(start_idx, end_idx, selected_vars)
+    st.dataframe(summary_data)
+    
+    # Raw data display
+    with st.expander("View Raw Data"):
+        st.dataframe(display_data[selected_vars])
+
+    source = f"the column store in {STORE_DIR}" if has_store(STORE_DIR) else CSV_FILE
+    st.caption(f"{len(data)} samples loaded from {source}, last checked {datetime.now():%H:%M:%S}")
+
 # Main dashboard function
 def main():
     st.title("Gyroscope Data Dashboard")
     st.write("Interactive visualization of gyroscope data from Arduino Nano 33 IoT")
     
     # Load data
-    data = load_data()
+    data = snapshot(data_version())
     
     if data.empty:
         st.warning("No data found. Please ensure the CSV file exists and contains data.")
@@ -106,8 +247,8 @@ def main():
         
         st.write(f"Showing page {st.session_state.page_num + 1} of {max_pages + 1}")
         
-        # Auto-refresh toggle
-        auto_refresh = st.checkbox("Auto-refresh (10s)", value=True)
+        # Live update toggle
+        auto_refresh = st.checkbox(f"Live update ({REFRESH_SECONDS}s)", value=True)
         
         # Data info
         st.header("Data Info")
@@ -115,91 +256,9 @@ def main():
         if 'timestamp' in data.columns:
             st.write(f"Last updated: {data['timestamp'].max()}")
 
-    # Calculate data range to display
-    start_idx = st.session_state.page_num * samples_per_page
-    end_idx = start_idx + samples_per_page
-    display_data = data.iloc[start_idx:end_idx]
-    
-    # Main visualization area
-    st.header("Data Visualization")
-    
-    try:
-        # Create appropriate visualization based on selection
-        if graph_type == "Line Chart":
-            fig = px.line(
-                display_data,
-                x='timestamp' if 'timestamp' in display_data.columns else display_data.index,
-                y=selected_vars,
-                title=f"Gyroscope Data - {graph_type}",
-                labels={'value': 'Angular Velocity (rad/s)'}
-            )
-        elif graph_type == "Scatter Plot":
-            if len(selected_vars) >= 2:
-                fig = px.scatter(
-                    display_data,
-                    x=selected_vars[0],
-                    y=selected_vars[1],
-                    title=f"Gyroscope Data - {graph_type}",
-                    labels={'value': 'Angular Velocity (rad/s)'}
-                )
-            else:
-                st.warning("Select at least 2 variables for scatter plot")
-                return
-        elif graph_type == "Histogram":
-            fig = px.histogram(
-                display_data,
-                x=selected_vars,
-                title=f"Gyroscope Data - {graph_type}",
-                labels={'value': 'Angular Velocity (rad/s)'},
-                marginal="rug",
-                barmode="overlay"
-            )
-        elif graph_type == "Box Plot":
-            fig = px.box(
-                display_data,
-                y=selected_vars,
-                title=f"Gyroscope Data - {graph_type}",
-                labels={'value': 'Angular Velocity (rad/s)'}
-            )
-        elif graph_type == "Violin Plot":
-            fig = px.violin(
-                display_data,
-                y=selected_vars,
-                title=f"Gyroscope Data - {graph_type}",
-                labels={'value': 'Angular Velocity (rad/s)'},
-                box=True
-            )
-        
-        # Display the plot
-        st.plotly_chart(fig, use_container_width=True)
-    except Exception as e:
-        st.error(f"Error creating visualization: {str(e)}")
-    
-    # Data summary table
-    st.header("Data Summary")
-    summary_data = display_data[selected_vars].describe()
-    st.dataframe(summary_data)
-    
-    # Raw data display
-    with st.expander("View Raw Data"):
-        st.dataframe(display_data[selected_vars])
-    
-    # Auto-refresh logic
-    if auto_refresh:
-        time.sleep(10)
-        st.rerun()
-
-# Set up file watcher if needed
-if not hasattr(st.session_state, 'watcher_setup'):
-    try:
-        path = os.path.dirname(os.path.abspath('gyroscope_data.csv'))
-        event_handler = CSVHandler(lambda: st.rerun())
-        observer = Observer()
-        observer.schedule(event_handler, path, recursive=False)
-        observer.start()
-        st.session_state.watcher_setup = True
-    except Exception as e:
-        st.error(f"Could not set up file watcher: {str(e)}")
+    # Only the fragment re-runs on the timer; the sidebar and page layout stay as they are
+    st.fragment(live_view, run_every=REFRESH_SECONDS if auto_refresh else None)(
+        graph_type, selected_vars, samples_per_page)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()